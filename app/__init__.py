@@ -7,7 +7,6 @@ add admin models and views
 
 import logging
 import os
-from datetime import datetime
 from logging.handlers import RotatingFileHandler, SMTPHandler
 
 from flask import Flask, request, url_for
@@ -37,10 +36,6 @@ moment = Moment(app)
 modal = Modal(app)
 babel = Babel(app)
 
-date_today = datetime(
-    datetime.today().year, datetime.today().month, datetime.today().day
-)
-
 from app.admin_panel.barista import BaristaAdmin
 from app.admin_panel.by_weight import ByWeightAdmin
 from app.admin_panel.category import CategoryAdmin
@@ -49,6 +44,7 @@ from app.admin_panel.deposit_funds import DepositFundsAdmin
 from app.admin_panel.expense import ExpenseAdmin
 from app.admin_panel.index import IndexAdmin
 from app.admin_panel import ModelView
+from app.admin_panel.product import ProductAdmin
 from app.admin_panel.report import ReportAdmin
 from app.admin_panel.role import RoleAdmin
 from app.admin_panel.shop import ShopAdmin
@@ -58,7 +54,7 @@ from app.admin_panel.supply import SupplyAdmin
 from app.admin_panel.transfer_product import TransferProductAdmin
 from app.admin_panel.write_off import WriteOffAdmin
 
-from app import models
+from app import cash_ledger, ledger, models, query_stats, stock
 from app.routes import auth, errors
 from app.routes.menu import menu
 from app.routes.report import report
@@ -152,6 +148,11 @@ admin.add_view(
         models.Category, db.session, name=_l("Категории"), category=_l("Разное")
     )
 )
+admin.add_view(
+    ProductAdmin(
+        models.Product, db.session, name=_l("Каталог товаров"), category=_l("Разное")
+    )
+)
 admin.add_view(
     RoleAdmin(models.Role, db.session, name=_l("Доступ"), category=_l("Разное"))
 )
@@ -0,0 +1,100 @@
+"""
+Module contains authorization context of current user: roles,
+work place and storage ids, loaded once per request
+"""
+
+
+from typing import NamedTuple, Optional
+
+from flask import g, has_request_context
+from flask_security import current_user
+from sqlalchemy import String, cast, literal, union_all
+
+from app import db
+from app.models import Barista, Role, Storage, baristas, roles
+
+
+class Access(NamedTuple):
+    """Roles and work places of user"""
+
+    barista_id: Optional[int]
+    roles: frozenset
+    shop_ids: frozenset
+    storage_ids: frozenset
+
+    def has_role(self, *names) -> bool:
+        """User has any of roles"""
+        return not self.roles.isdisjoint(names)
+
+    @property
+    def is_admin(self) -> bool:
+        """User has admin role"""
+        return "admin" in self.roles
+
+    @property
+    def is_staff(self) -> bool:
+        """User has admin or moderator role"""
+        return self.has_role("admin", "moderator")
+
+    def works_at(self, shop_id) -> bool:
+        """Shop is work place of user, admin works at every shop"""
+        if self.is_admin:
+            return True
+        try:
+            return int(shop_id) in self.shop_ids
+        except (TypeError, ValueError):
+            return False
+
+    def shop_filter(self, column):
+        """
+        Filter of column by work places as subquery, None for admin
+        :param column: shop id column
+        """
+        if self.is_admin:
+            return None
+        return column.in_(Barista.work_shop_ids(self.barista_id))
+
+    def storage_filter(self, column):
+        """
+        Filter of column by work place storages as subquery, None for admin
+        :param column: storage id column
+        """
+        if self.is_admin:
+            return None
+        return column.in_(Barista.work_storage_ids(self.barista_id))
+
+
+ANONYMOUS = Access(None, frozenset(), frozenset(), frozenset())
+
+
+def load_access(barista_id) -> Access:
+    """Roles, shop ids and storage ids of barista in one query"""
+    _query = union_all(
+        db.select(literal("role"), Role.name)
+        .join_from(roles, Role, roles.c.role_id == Role.id)
+        .where(roles.c.barista_id == barista_id),
+        db.select(literal("shop"), cast(baristas.c.shop_id, String)).where(
+            baristas.c.barista_id == barista_id
+        ),
+        db.select(literal("storage"), cast(Storage.id, String)).where(
+            Storage.shop_id.in_(Barista.work_shop_ids(barista_id))
+        ),
+    )
+    values = {"role": set(), "shop": set(), "storage": set()}
+    for kind, value in db.session.execute(_query):
+        values[kind].add(value)
+    return Access(
+        barista_id,
+        frozenset(values["role"]),
+        frozenset(int(value) for value in values["shop"]),
+        frozenset(int(value) for value in values["storage"]),
+    )
+
+
+def access_context() -> Access:
+    """Access of current user, loaded once per request"""
+    if not has_request_context() or not current_user.is_authenticated:
+        return ANONYMOUS
+    if "access" not in g:
+        g.access = load_access(current_user.id)
+    return g.access
@@ -5,13 +5,19 @@ Init package to admin panel
 
 import logging
 from datetime import date
+from statistics import median
 
-from flask import abort, redirect, request, url_for
+from flask import Markup, abort, g, redirect, request, url_for
 from flask_admin.contrib import sqla
 from flask_admin.model import typefmt
 from flask_security import current_user
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 
-from app.models import Storage
+from app import dashboard
+from app.access import access_context
+from app.cache import product_catalog, product_choices, reference_cache
+from app.pagination import cursor, estimated_count, parse_cursor, seek
 
 from .exceptions import UserRoleException
 
@@ -27,12 +33,26 @@ class ModelView(sqla.ModelView):
     )
 
     details_template = "admin/model/details.html"
+    # shops, categories and baristas are cached as form choices
+    reference_data = False
+    # default list order pages by (timestamp, id) cursors instead of OFFSET
+    keyset_pagination = False
+    # show estimated rows count of unfiltered keyset list, PostgreSQL only
+    keyset_estimated_count = False
+    # relationship paths loaded with list rows, e.g. "storage.shop":
+    # joined for many-to-one, selectin for collections
+    loading_profile = ()
+
+    @property
+    def simple_list_pager(self):
+        """Keyset lists do not count rows"""
+        return self.keyset_pagination
 
     @property
     def can_delete(self):
         """Delete operation, depends on role"""
         try:
-            is_admin = current_user.has_role("admin")
+            is_admin = access_context().is_admin
             is_active = current_user.is_active and current_user.is_authenticated
             return is_active and is_admin
         except UserRoleException:
@@ -43,7 +63,7 @@ class ModelView(sqla.ModelView):
     def can_create(self):
         """Create operation, depends on role"""
         try:
-            is_admin = current_user.has_role("admin")
+            is_admin = access_context().is_admin
             is_active = current_user.is_active and current_user.is_authenticated
             return is_active and is_admin
         except UserRoleException:
@@ -55,10 +75,7 @@ class ModelView(sqla.ModelView):
         try:
             is_active = current_user.is_active and current_user.is_authenticated
 
-            is_admin = current_user.has_administrative_rights
-            is_moderator = current_user.has_moderator_rights
-
-            return is_active and is_admin or is_moderator
+            return is_active and access_context().is_staff
         except UserRoleException:
             return False
 
@@ -70,22 +87,118 @@ class ModelView(sqla.ModelView):
             else:
                 return redirect(url_for("login", next=request.url))
 
-    def get_model_data(self):
-        """Return model data"""
-        view_args = self._get_list_extra_args()
-        sort_column = self._get_column_by_idx(view_args.sort)
-        if sort_column is not None:
-            sort_column = sort_column[0]
-
-        _, data = self.get_list(
-            view_args.page,
-            sort_column,
-            view_args.sort_desc,
-            view_args.search,
-            view_args.filters,
-            page_size=self.page_size,
+    def scope_query(self, query):
+        """Restrict query to rows visible to current user"""
+        return query
+
+    def loading_options(self) -> list:
+        """Loader options of loading profile paths"""
+        options = []
+        for path in self.loading_profile:
+            model, option = self.model, None
+            for name in path.split("."):
+                attr = getattr(model, name)
+                loader = selectinload if attr.property.uselist else joinedload
+                if option is None:
+                    option = loader(attr)
+                else:
+                    option = getattr(option, loader.__name__)(attr)
+                model = attr.property.mapper.class_
+            options.append(option)
+        return options
+
+    def get_query(self):
+        """Visible rows with loading profile"""
+        _query = self.scope_query(super().get_query())
+        return _query.options(*self.loading_options())
+
+    def get_count_query(self):
+        """Count of visible rows"""
+        return self.scope_query(super().get_count_query())
+
+    def get_list(
+        self,
+        page,
+        sort_column,
+        sort_desc,
+        search,
+        filters,
+        execute=True,
+        page_size=None,
+    ):
+        """List rows, default order of keyset view seeks past cursor"""
+        after, before = request.args.get("after"), request.args.get("before")
+        # other sort orders and page jumps without cursor use OFFSET
+        has_cursor = parse_cursor(after) or parse_cursor(before)
+        if (
+            not self.keyset_pagination
+            or sort_column is not None
+            or (page and not has_cursor)
+        ):
+            return super().get_list(
+                page, sort_column, sort_desc, search, filters, execute, page_size
+            )
+        _count, _query = super().get_list(
+            None, None, None, search, filters, False, page_size
         )
-        return data
+        page_size = page_size or self.page_size
+        _query = seek(_query, self.model, after, before)
+        if page_size:
+            _query = _query.limit(page_size)
+        count = None
+        if self.keyset_estimated_count and not (search or filters):
+            count = estimated_count(_query, self.model)
+        if not execute:
+            return count, _query
+        data = _query.all()
+        if parse_cursor(before):
+            data.reverse()
+        if data:
+            g.keyset_cursors = dict(
+                page=page or 0, first=cursor(data[0]), last=cursor(data[-1])
+            )
+        return count, data
+
+    def _get_list_url(self, view_args):
+        """List url, neighbour pages of keyset list get cursors"""
+        cursors = g.get("keyset_cursors")
+        if self.keyset_pagination and cursors:
+            extra_args = {
+                k: v
+                for k, v in view_args.extra_args.items()
+                if k not in ("after", "before")
+            }
+            if view_args.page and view_args.page == cursors["page"] + 1:
+                extra_args["after"] = cursors["last"]
+            elif view_args.page and view_args.page == cursors["page"] - 1:
+                extra_args["before"] = cursors["first"]
+            view_args = view_args.clone(extra_args=extra_args)
+        return super()._get_list_url(view_args)
+
+    def _invalidate_caches(self):
+        """Drop cached dashboard totals and reference data"""
+        dashboard.invalidate()
+        if self.reference_data:
+            reference_cache.clear()
+
+    def _post_as(self):
+        """Balance changes made by this view go to cash ledger as model changes"""
+        self.session.info["cash_reason"] = self.model.__tablename__
+
+    def _on_model_change(self, form, model, is_created):
+        """Run model hooks and drop cached data"""
+        self._post_as()
+        super()._on_model_change(form, model, is_created)
+        self._invalidate_caches()
+
+    def delete_model(self, model):
+        """Delete model, balance changes posted as model changes"""
+        self._post_as()
+        return super().delete_model(model)
+
+    def after_model_delete(self, model):
+        """Drop cached data"""
+        self._invalidate_caches()
 
 
 class ModeratorView(ModelView):
@@ -99,52 +212,177 @@ class ModeratorView(ModelView):
         """
         return self.model.id
 
-    @staticmethod
-    def staff_shops_id():
-        """Get shop list by current_user"""
-        shop_ids = (shop.id for shop in current_user.shop)
-        return shop_ids
-
-    def get_query(self):
-        """Query depends on role"""
-        shop_id = self.shop_id
-        _query = super().get_query()
-        if not current_user.has_role("admin"):
-            _query = _query.filter(shop_id.in_(self.staff_shops_id()))
-        return _query
-
-    def get_count_query(self):
-        """Count shops depends on role"""
-        shop_id = self.shop_id
-        _query = super().get_count_query()
-        if not current_user.has_role("admin"):
-            _query = _query.filter(shop_id.in_(self.staff_shops_id()))
-        return _query
+    def scope_query(self, query):
+        """Query depends on role, work places as subquery"""
+        criterion = access_context().shop_filter(self.shop_id)
+        if criterion is not None:
+            query = query.filter(criterion)
+        return query
 
 
 class StorageModeratorView(ModelView):
     """Storage moderator view in admin panel"""
 
-    @staticmethod
-    def staff_storage_id():
-        """Get storage list by current_user"""
-        storage_ids = (storage.id for storage in current_user.storage)
-        return storage_ids
+    def scope_query(self, query):
+        """Query depends on role, work place storages as subquery"""
+        criterion = access_context().storage_filter(self.model.storage_id)
+        if criterion is not None:
+            query = query.filter(criterion)
+        return query
 
-    def get_query(self):
-        """Query depends on role"""
-        _query = super().get_query()
-        if not current_user.has_role("admin"):
-            _query = self.model.query.join(self.model.storage).filter(
-                Storage.id.in_(self.staff_storage_id())
+
+RANKS = (0.5, 0.9, 0.99)
+
+
+def summary_aggregates(query, columns, ranks=RANKS) -> list:
+    """
+    Sum and continuous percentiles of every column over query rows
+    without loading them. PostgreSQL aggregates with percentile_cont in
+    one query, other databases count values, then pick the values around
+    every percentile with ORDER BY ... LIMIT 1 OFFSET subqueries
+    :return: list of (sum, dict rank -> value), one per column
+    """
+    if not columns:
+        return []
+    if query.session.get_bind().dialect.name == "postgresql":
+        aggregates = []
+        for column in columns:
+            aggregates.append(func.sum(column))
+            aggregates.extend(
+                func.percentile_cont(rank).within_group(column) for rank in ranks
             )
-        return _query
+        row = query.with_entities(*aggregates).one()
+        step = len(ranks) + 1
+        result = []
+        for index in range(len(columns)):
+            total, *values = row[index * step : (index + 1) * step]
+            ranked = {rank: round(value or 0, 2) for rank, value in zip(ranks, values)}
+            result.append((total or 0, ranked))
+        return result
 
-    def get_count_query(self):
-        """Count shops depends on role"""
-        _query = super().get_count_query()
-        if not current_user.has_role("admin"):
-            _query = _query.join(self.model.storage).filter(
-                Storage.id.in_(self.staff_storage_id())
+    row = query.with_entities(
+        *[func.sum(column) for column in columns],
+        *[func.count(column) for column in columns],
+    ).one()
+    totals, counts = row[: len(columns)], row[len(columns) :]
+    fractions, subqueries = [], []
+    for column, count in zip(columns, counts):
+        values = query.with_entities(column).filter(column.isnot(None))
+        values = values.order_by(None).order_by(column)
+        for rank in ranks:
+            position = rank * max(count - 1, 0)
+            lower = int(position)
+            fractions.append(position - lower)
+            for offset in (lower, min(lower + 1, max(count - 1, 0))):
+                subqueries.append(values.limit(1).offset(offset).scalar_subquery())
+    picked = [0] * len(subqueries)
+    if any(counts):
+        picked = query.session.query(*subqueries).one()
+    picked, fractions = iter(picked), iter(fractions)
+    result = []
+    for total, count in zip(totals, counts):
+        ranked = {}
+        for rank in ranks:
+            lower, upper, fraction = next(picked), next(picked), next(fractions)
+            value = lower + (upper - lower) * fraction if count else 0
+            ranked[rank] = round(value, 2)
+        result.append((total or 0, ranked))
+    return result
+
+
+class SummaryMixin:
+    """
+    Summary footers for list views:
+    sum and median of summary_fields on page, sum, median
+    and upper percentiles over all rows matching current filters
+    """
+
+    summary_fields = ()
+
+    def summary_query(self):
+        """List query with role scope, search and filters, without paging"""
+        view_args = self._get_list_extra_args()
+        _query = self.scope_query(self.session.query(self.model))
+        joins = {}
+        if self._search_supported and view_args.search:
+            _query, _, joins, _ = self._apply_search(
+                _query, None, joins, {}, view_args.search
+            )
+        if view_args.filters and self._filters:
+            _query, _, joins, _ = self._apply_filters(
+                _query, None, joins, {}, view_args.filters
             )
         return _query
+
+    def summary_total(self) -> dict:
+        """Sum and percentiles of all summary fields in one query"""
+        columns = [getattr(self.model, field) for field in self.summary_fields]
+        aggregates = summary_aggregates(self.summary_query(), columns)
+        total = {"sum": {}, "p50": {}, "p90": {}, "p99": {}}
+        for field, (value, ranks) in zip(self.summary_fields, aggregates):
+            total["sum"][field] = value
+            total["p50"][field] = ranks[0.5]
+            total["p90"][field] = ranks[0.9]
+            total["p99"][field] = ranks[0.99]
+        return total
+
+    def summary_page(self, data) -> dict:
+        """Sum and median of summary fields over already loaded page rows"""
+        page = {"sum": {}, "median": {}}
+        for field in self.summary_fields:
+            values = [getattr(m, field) for m in data if getattr(m, field) is not None]
+            page["sum"][field] = sum(values)
+            page["median"][field] = median(values) if values else 0
+        return page
+
+    def render(self, template, **kwargs):
+        """Render template, list view gets summary footers"""
+        kwargs["column_labels"] = self.column_labels
+        if "data" in kwargs:
+            page = self.summary_page(kwargs["data"])
+            total = self.summary_total()
+            kwargs["summary_data"] = {"on_page": page["sum"], "total": total["sum"]}
+            kwargs["median_data"] = {"on_page": page["median"], "total": total["p50"]}
+            kwargs["percentile_data"] = {"p90": total["p90"], "p99": total["p99"]}
+        return super().render(template, **kwargs)
+
+
+def list_product_name(view, context, model, name):
+    """Product label from catalog, product code when not in catalog"""
+    del view, context, name
+    label, _unit, _is_piece = product_catalog().get(
+        model.product_name, (model.product_name, "", False)
+    )
+    return Markup(f"{label}")
+
+
+def list_product_amount(view, context, model, name):
+    """Amount with product unit from catalog"""
+    del view, context, name
+    if not model.amount:
+        return ""
+    _label, unit, _is_piece = product_catalog().get(
+        model.product_name, (model.product_name, "", False)
+    )
+    return Markup(f"{model.amount} {unit}".rstrip())
+
+
+class CatalogMixin:
+    """
+    Product select of form from product catalog,
+    weighed_products limits it to products sold by weight
+    """
+
+    weighed_products = False
+
+    def create_form(self, obj=None):
+        """Create form with catalog products"""
+        form = super().create_form(obj)
+        form.product_name.choices = product_choices(self.weighed_products)
+        return form
+
+    def edit_form(self, obj=None):
+        """Edit form with catalog products"""
+        form = super().edit_form(obj)
+        form.product_name.choices = product_choices(self.weighed_products)
+        return form
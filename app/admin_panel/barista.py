@@ -8,6 +8,7 @@ from flask_admin.babel import gettext
 from flask_security import current_user
 from wtforms.validators import DataRequired
 
+from app.access import access_context
 from app.models import Shop
 
 from . import ModelView
@@ -17,6 +18,7 @@ class BaristaAdmin(ModelView):
     """Barista model view"""
 
     can_set_page_size = True
+    reference_data = True
     column_filters = ("name", "phone_number", "email", Shop.place_name, Shop.address)
     column_searchable_list = ("name", "phone_number", "email")
     column_exclude_list = (
@@ -108,7 +110,7 @@ class BaristaAdmin(ModelView):
     @property
     def can_edit(self):
         """Edit operation, depends on role"""
-        is_admin = current_user.has_role("admin")
+        is_admin = access_context().is_admin
         is_active = current_user.is_active and current_user.is_authenticated
 
         if is_active and is_admin:
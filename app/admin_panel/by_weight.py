@@ -4,66 +4,40 @@ Module contains admin view for ByWeight model
 
 
 from datetime import datetime
-from statistics import median, StatisticsError
 
 from flask import Markup, flash
 from flask_admin.babel import gettext
 from flask_security import current_user
-from sqlalchemy import func
 from wtforms import BooleanField, RadioField, SelectField
 from wtforms.validators import (DataRequired, InputRequired, NumberRange,
                                 Required)
 
-from app.models import Barista, ByWeight
+from app.models import Barista, ByWeight, StockLevel
 
-from . import StorageModeratorView, log
-from .exceptions import FailedUpdateException, QueryException
+from . import (CatalogMixin, StorageModeratorView, SummaryMixin,
+               list_product_amount, list_product_name, log)
+from .exceptions import FailedUpdateException
 
 
-class ByWeightAdmin(StorageModeratorView):
+class ByWeightAdmin(CatalogMixin, SummaryMixin, StorageModeratorView):
     """ByWeight model view"""
 
-    @staticmethod
-    def _list_amount(context, model, name):
-        """Private method, adds units of physical values"""
-        del context, name
-        if not model.amount:
-            return ""
-        if model.product_name == "milk":
-            result = f"{model.amount} л"
-        elif model.product_name in ("coffee_arabika", "coffee_blend"):
-            result = f"{model.amount} кг"
-        else:
-            result = f"{model.amount} шт."
-        return Markup(f"{result}")
-
-    @staticmethod
-    def _list_money(context, model, name):
+    def _list_money(view, context, model, name):
         """Private method, add type of cash"""
-        del context, name
+        del view, context, name
         if not model.money:
             return ""
         type_cost = "" if model.type_cost == "cash" else " (Безнал)"
         formatter = f"{model.money} грн.{type_cost}"
         return Markup(f"{formatter}")
 
-    @staticmethod
-    def _list_product_name(context, model, name):
-        """Private method, translate product name"""
-        del context, name
-        prettified = dict(
-            coffee_arabika=gettext("арабика"),
-            coffee_blend=gettext("купаж"),
-            milk=gettext("молоко"),
-            panini=gettext("панини"),
-            sausages=gettext("колбаски"),
-            buns=gettext("булочки"),
-        )
-        return Markup(f"{prettified[model.product_name]}")
-
     list_template = "admin/model/by_weight_list.html"
+    weighed_products = True
+    summary_fields = ("amount", "money")
     can_view_details = True
     can_set_page_size = True
+    keyset_pagination = True
+    loading_profile = ("storage.shop",)
     column_list = ("timestamp", "product_name", "amount", "money", "storage")
     column_labels = dict(
         timestamp=gettext("Дата"),
@@ -80,9 +54,9 @@ class ByWeightAdmin(StorageModeratorView):
     column_filters = ("timestamp", "type_cost", "product_name", Barista.name)
     column_formatters = dict(
         type_cost=lambda v, c, m, p: "Наличка" if m.type_cost == "cash" else "Безнал",
-        product_name=_list_product_name,
+        product_name=list_product_name,
         money=_list_money,
-        amount=_list_amount,
+        amount=list_product_amount,
     )
     form_create_rules = (
         "backdating",
@@ -138,10 +112,6 @@ class ByWeightAdmin(StorageModeratorView):
         ),
         product_name=SelectField(
             gettext("Название товара"),
-            choices=[
-                ("coffee_arabika", gettext("Арабика")),
-                ("coffee_blend", gettext("Купаж")),
-            ],
             validators=[Required()],
         ),
     )
@@ -152,53 +122,6 @@ class ByWeightAdmin(StorageModeratorView):
         "amount": {"placeholder": gettext("Количество в кг, л, и поштучно")},
     }
 
-    def sum_page(self, attr: str) -> int:
-        """Query sum on page"""
-        _query = self.get_model_data()
-        try:
-            return sum([p.__dict__[attr] for p in _query if p])
-        except (Exception, QueryException):
-            return 0
-
-    def sum_total(self, attr: str) -> int:
-        """Query total sum"""
-        _query = self.session.query(func.sum(ByWeight.__dict__[attr])).scalar()
-        try:
-            return _query
-        except (Exception, QueryException):
-            return 0
-
-    def median_page(self, attr: str) -> int:
-        """Query median on page"""
-        _query = self.get_model_data()
-        data = [p.__dict__[attr] for p in _query if p]
-        try:
-            return median(data)
-        except StatisticsError:
-            return 0
-
-    def median_total(self, attr: str) -> int:
-        """Query total median"""
-        _query = self.session.query(func.avg(ByWeight.__dict__[attr])).scalar()
-        try:
-            return round(_query)
-        except TypeError:
-            return 0
-
-    def render(self, template, **kwargs):
-        """Render template"""
-        _current_page = kwargs
-        kwargs["column_labels"] = self.column_labels
-        kwargs["summary_data"] = {"on_page": {}, "total": {}}
-        kwargs["median_data"] = {"on_page": {}, "total": {}}
-        render_fields = ("amount", "money")
-        for field in render_fields:
-            kwargs["summary_data"]["on_page"][field] = self.sum_page(field)
-            kwargs["summary_data"]["total"][field] = self.sum_total(field)
-            kwargs["median_data"]["on_page"][field] = self.median_page(field)
-            kwargs["median_data"]["total"][field] = self.median_total(field)
-        return super().render(template, **kwargs)
-
     def create_form(self, obj=None):
         """Before create form"""
         form = super().create_form(obj)
@@ -248,10 +171,12 @@ class ByWeightAdmin(StorageModeratorView):
             model.backdating = form.backdating.data
             return
 
-        if form.product_name.data == "coffee_blend":
-            model.storage.coffee_blend -= float(form.amount.data)
-        else:
-            model.storage.coffee_arabika -= float(form.amount.data)
+        StockLevel.add(
+            model.storage.id,
+            form.product_name.data,
+            -float(form.amount.data),
+            "by_weight",
+        )
 
         if form.type_cost.data == "cash":
             model.storage.shop.cash += form.money.data
@@ -269,20 +194,21 @@ class ByWeightAdmin(StorageModeratorView):
             else:
                 model.storage.shop.cashless -= form.money.data
 
-            if form.product_name.data == "coffee_blend":
-                model.storage.coffee_blend += float(form.amount.data)
-            else:
-                model.storage.coffee_arabika += float(form.amount.data)
+            StockLevel.add(
+                model.storage.id,
+                form.product_name.data,
+                float(form.amount.data),
+                "by_weight",
+            )
             self.session.commit()
 
     def on_model_delete(self, model):
         """Work with model after delete"""
         if model.backdating:
             return
-        if model.product_name == "coffee_blend":
-            model.storage.coffee_blend += float(model.amount)
-        else:
-            model.storage.coffee_arabika += float(model.amount)
+        StockLevel.add(
+            model.storage.id, model.product_name, float(model.amount), "by_weight"
+        )
 
         if model.type_cost == "cash":
             model.storage.shop.cash -= model.money
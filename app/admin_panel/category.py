@@ -13,6 +13,7 @@ class CategoryAdmin(ModelView):
     """Category model view"""
 
     can_view_details = True
+    reference_data = True
     can_set_page_size = True
     column_labels = dict(name=gettext("Название категории"), expense=gettext("Расходы"))
     form_create_rules = ("name",)
@@ -4,29 +4,26 @@ Module contains admin view for CollectionFunds model
 
 
 from datetime import datetime
-from statistics import median, StatisticsError
 
 from flask import Markup, flash
 from flask_admin.babel import gettext
 from flask_security import current_user
-from sqlalchemy import func
 from wtforms import BooleanField, RadioField
 from wtforms.validators import (DataRequired, InputRequired, NumberRange,
                                 Required)
 
 from app.models import Barista, CollectionFund, Shop
 
-from . import ModeratorView, log
-from .exceptions import FailedUpdateException, QueryException
+from . import ModeratorView, SummaryMixin, log
+from .exceptions import FailedUpdateException
 
 
-class CollectionFundsAdmin(ModeratorView):
+class CollectionFundsAdmin(SummaryMixin, ModeratorView):
     """CollectionFunds model view"""
 
-    @staticmethod
-    def _list_money(context, model, name):
+    def _list_money(view, context, model, name):
         """Private method, add type of cash"""
-        del context, name
+        del view, context, name
         if not model.money:
             return ""
         type_cost = "" if model.type_cost == "cash" else " (Безнал)"
@@ -34,8 +31,11 @@ class CollectionFundsAdmin(ModeratorView):
         return Markup(f"{formatter}")
 
     list_template = "admin/model/collection_funds_list.html"
+    summary_fields = ("money",)
     can_view_details = True
     can_set_page_size = True
+    keyset_pagination = True
+    loading_profile = ("shop", "barista")
     column_list = ("timestamp", "money", "shop", "barista")
     form_create_rules = (
         "backdating",
@@ -110,53 +110,6 @@ class CollectionFundsAdmin(ModeratorView):
     def shop_id(self):
         return self.model.shop_id
 
-    def sum_page(self, attr: str) -> int:
-        """Query sum on page"""
-        _query = self.get_model_data()
-        try:
-            return sum([p.__dict__[attr] for p in _query if p])
-        except (Exception, QueryException):
-            return 0
-
-    def sum_total(self, attr: str) -> int:
-        """Query total sum"""
-        _query = self.session.query(func.sum(CollectionFund.__dict__[attr])).scalar()
-        try:
-            return _query
-        except (Exception, QueryException):
-            return 0
-
-    def median_page(self, attr: str) -> int:
-        """Query median on page"""
-        _query = self.get_model_data()
-        data = [p.__dict__[attr] for p in _query if p]
-        try:
-            return median(data)
-        except StatisticsError:
-            return 0
-
-    def median_total(self, attr: str) -> int:
-        """Query total median"""
-        _query = self.session.query(func.avg(CollectionFund.__dict__[attr])).scalar()
-        try:
-            return round(_query)
-        except TypeError:
-            return 0
-
-    def render(self, template, **kwargs):
-        """Render template"""
-        _current_page = kwargs
-        kwargs["column_labels"] = self.column_labels
-        kwargs["summary_data"] = {"on_page": {}, "total": {}}
-        kwargs["median_data"] = {"on_page": {}, "total": {}}
-        render_fields = ("money",)
-        for field in render_fields:
-            kwargs["summary_data"]["on_page"][field] = self.sum_page(field)
-            kwargs["summary_data"]["total"][field] = self.sum_total(field)
-            kwargs["median_data"]["on_page"][field] = self.median_page(field)
-            kwargs["median_data"]["total"][field] = self.median_total(field)
-        return super().render(template, **kwargs)
-
     def create_form(self, obj=None):
         """Before create form"""
         form = super().create_form(obj)
@@ -3,28 +3,25 @@ Module contains admin view for Expense model
 """
 
 from datetime import datetime
-from statistics import median, StatisticsError
 
 from flask import Markup, flash
 from flask_admin.babel import gettext
 from flask_security import current_user
-from sqlalchemy import func
 from wtforms import BooleanField, RadioField
 from wtforms.validators import (DataRequired, InputRequired, NumberRange,
                                 Required)
 
 from app.models import Barista, Expense, Shop
 
-from . import ModeratorView, log
-from .exceptions import FailedUpdateException, QueryException
+from . import ModeratorView, SummaryMixin, log
+from .exceptions import FailedUpdateException
 
 
-class ExpenseAdmin(ModeratorView):
+class ExpenseAdmin(SummaryMixin, ModeratorView):
     """Expense model view"""
 
-    @staticmethod
-    def _list_money(context, model, name):
-        del context, name
+    def _list_money(view, context, model, name):
+        del view, context, name
         if not model.money:
             return ""
         type_cost = "" if model.type_cost == "cash" else " (Безнал)"
@@ -32,7 +29,11 @@ class ExpenseAdmin(ModeratorView):
         return Markup(f"{formatter}")
 
     list_template = "admin/model/expense_list.html"
+    summary_fields = ("money",)
     can_set_page_size = True
+    keyset_pagination = True
+    keyset_estimated_count = True
+    loading_profile = ("shop", "categories")
     column_list = ("timestamp", "money", "is_global", "categories", "shop")
     form_create_rules = (
         "backdating",
@@ -130,53 +131,6 @@ class ExpenseAdmin(ModeratorView):
     def shop_id(self):
         return self.model.shop_id
 
-    def sum_page(self, attr: str) -> int:
-        """Query sum on page"""
-        _query = self.get_model_data()
-        try:
-            return sum([p.__dict__[attr] for p in _query if p])
-        except (Exception, QueryException):
-            return 0
-
-    def sum_total(self, attr: str) -> int:
-        """Query total sum"""
-        _query = self.session.query(func.sum(Expense.__dict__[attr])).scalar()
-        try:
-            return _query
-        except (Exception, QueryException):
-            return 0
-
-    def median_page(self, attr: str) -> int:
-        """Query median on page"""
-        _query = self.get_model_data()
-        data = [p.__dict__[attr] for p in _query if p]
-        try:
-            return median(data)
-        except StatisticsError:
-            return 0
-
-    def median_total(self, attr: str) -> int:
-        """Query total median"""
-        _query = self.session.query(func.avg(Expense.__dict__[attr])).scalar()
-        try:
-            return round(_query)
-        except TypeError:
-            return 0
-
-    def render(self, template, **kwargs):
-        """Render template"""
-        _current_page = kwargs
-        kwargs["column_labels"] = self.column_labels
-        kwargs["summary_data"] = {"on_page": {}, "total": {}}
-        kwargs["median_data"] = {"on_page": {}, "total": {}}
-        render_fields = ("money",)
-        for field in render_fields:
-            kwargs["summary_data"]["on_page"][field] = self.sum_page(field)
-            kwargs["summary_data"]["total"][field] = self.sum_total(field)
-            kwargs["median_data"]["on_page"][field] = self.median_page(field)
-            kwargs["median_data"]["total"][field] = self.median_total(field)
-        return super().render(template, **kwargs)
-
     def create_form(self, obj=None):
         """Before create form"""
         form = super().create_form(obj)
@@ -0,0 +1,33 @@
+"""
+Module contains admin view for Product model
+"""
+
+
+from flask_admin.babel import gettext
+from wtforms.validators import DataRequired
+
+from . import ModelView
+
+
+class ProductAdmin(ModelView):
+    """Product model view"""
+
+    can_view_details = True
+    reference_data = True
+    column_list = ("name", "title", "unit", "is_piece")
+    column_labels = dict(
+        name=gettext("Код"),
+        title=gettext("Название"),
+        unit=gettext("Ед. изм."),
+        is_piece=gettext("Штучный"),
+    )
+    form_columns = ("name", "title", "unit", "is_piece")
+    form_args = dict(
+        name=dict(validators=[DataRequired()]),
+        title=dict(validators=[DataRequired()]),
+    )
+    column_editable_list = ("title", "unit")
+    form_widget_args = {
+        "name": {"placeholder": gettext("Код товара латиницей, например milk")},
+        "unit": {"placeholder": gettext("кг, л, шт.")},
+    }
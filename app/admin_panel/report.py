@@ -4,27 +4,36 @@ Module contains admin view for Report model
 
 
 from datetime import datetime
-from statistics import median, StatisticsError
 
 from flask import flash
 from flask_admin.babel import gettext
 from flask_security import current_user
-from sqlalchemy import func
 from wtforms import BooleanField
 from wtforms.validators import DataRequired, InputRequired, NumberRange
 
-from app.models import Barista, ByWeight, Report, Shop
+from app.business_logic import reset_reports_sent_today
+from app.models import REPORT_PRODUCTS, Barista, ByWeight, Report, Shop
 
-from . import ModeratorView, log
-from .exceptions import FailedUpdateException, QueryException
+from . import ModeratorView, SummaryMixin, log
+from .exceptions import FailedUpdateException
 
 
-class ReportAdmin(ModeratorView):
+class ReportAdmin(SummaryMixin, ModeratorView):
     """Report model view"""
 
     list_template = "admin/model/report_list.html"
+    summary_fields = (
+        "cashbox",
+        "cash_balance",
+        "remainder_of_day",
+        "cashless",
+        "actual_balance",
+    )
     can_view_details = True
     can_set_page_size = True
+    keyset_pagination = True
+    keyset_estimated_count = True
+    loading_profile = ("shop", "barista", "expenses")
     column_default_sort = ("timestamp", True)
     column_formatters = dict(
         expenses=lambda v, c, m, p: sum(
@@ -370,65 +379,10 @@ class ReportAdmin(ModeratorView):
         "buns": {"placeholder": gettext("Количество булок, остаток на следующий день")},
     }
 
-    products = ("coffee_arabika", "coffee_blend", "milk", "panini", "sausages", "buns")
-
     @property
     def shop_id(self):
         return self.model.shop_id
 
-    def sum_page(self, attr: str) -> int:
-        """Query sum on page"""
-        _query = self.get_model_data()
-        try:
-            return sum([p.__dict__[attr] for p in _query if p])
-        except (Exception, QueryException):
-            return 0
-
-    def sum_total(self, attr: str) -> int:
-        """Query total sum"""
-        _query = self.session.query(func.sum(Report.__dict__[attr])).scalar()
-        try:
-            return _query
-        except (Exception, QueryException):
-            return 0
-
-    def median_page(self, attr: str) -> int:
-        """Query median on page"""
-        _query = self.get_model_data()
-        data = [p.__dict__[attr] for p in _query if p]
-        try:
-            return median(data)
-        except StatisticsError:
-            return 0
-
-    def median_total(self, attr: str) -> int:
-        """Query total median"""
-        _query = self.session.query(func.avg(Report.__dict__[attr])).scalar()
-        try:
-            return round(_query)
-        except TypeError:
-            return 0
-
-    def render(self, template, **kwargs):
-        """Render template"""
-        _current_page = kwargs
-        kwargs["column_labels"] = self.column_labels
-        kwargs["summary_data"] = {"on_page": {}, "total": {}}
-        kwargs["median_data"] = {"on_page": {}, "total": {}}
-        render_fields = (
-            "cashbox",
-            "cash_balance",
-            "remainder_of_day",
-            "cashless",
-            "actual_balance",
-        )
-        for field in render_fields:
-            kwargs["summary_data"]["on_page"][field] = self.sum_page(field)
-            kwargs["summary_data"]["total"][field] = self.sum_total(field)
-            kwargs["median_data"]["on_page"][field] = self.median_page(field)
-            kwargs["median_data"]["total"][field] = self.median_total(field)
-        return super().render(template, **kwargs)
-
     def create_form(self, obj=None):
         """Before create form"""
         form = super().create_form(obj)
@@ -594,27 +548,28 @@ class ReportAdmin(ModeratorView):
         model.shop.cash += model.cash_balance + expanses - by_weight
         model.shop.cashless += model.cashless
         weight_amount = self.weight_count(model)
-        for product in ReportAdmin.products:
+        for product in REPORT_PRODUCTS:
             if product in ["panini", "sausages", "buns"]:
                 consumption_value = (
-                    getattr(model.shop.storage, product)
+                    model.shop.storage.quantity(product)
                     - int(getattr(form, product).data)
                     + weight_amount(product)
                 )
             else:
                 consumption_value = (
-                    getattr(model.shop.storage, product)
+                    model.shop.storage.quantity(product)
                     - float(getattr(form, product).data)
                     + weight_amount(product)
                 )
             setattr(model, f"consumption_{product}", consumption_value)
-            consumption_to_storage = getattr(model.shop.storage, product) - getattr(
+            consumption_to_storage = model.shop.storage.quantity(product) - getattr(
                 model, f"consumption_{product}"
             )
-            setattr(model.shop.storage, product, consumption_to_storage)
+            model.shop.storage.set_quantity(product, consumption_to_storage, "report")
 
     def after_model_change(self, form, model, is_created):
         """Work with model after change"""
+        reset_reports_sent_today()
         if form.backdating.data:
             return
         if not is_created:
@@ -645,6 +600,11 @@ class ReportAdmin(ModeratorView):
                 model.consumption_buns += int(form.consumption_buns.data)
             self.session.commit()
 
+    def after_model_delete(self, model):
+        """Work with model after delete"""
+        super().after_model_delete(model)
+        reset_reports_sent_today()
+
     def on_model_delete(self, model):
         """Work with model after delete"""
         if model.backdating:
@@ -654,8 +614,10 @@ class ReportAdmin(ModeratorView):
             model.shop.cash -= model.cash_balance - by_weight
             model.shop.cashless -= model.cashless
 
-            for product in ReportAdmin.products:
-                consumption_to_storage = getattr(model.shop.storage, product) + getattr(
+            for product in REPORT_PRODUCTS:
+                consumption_to_storage = model.shop.storage.quantity(product) + getattr(
                     model, f"consumption_{product}"
                 )
-                setattr(model.shop.storage, product, consumption_to_storage)
+                model.shop.storage.set_quantity(
+                    product, consumption_to_storage, "report"
+                )
@@ -6,6 +6,8 @@ from flask_admin.babel import gettext
 from flask_security import current_user
 from wtforms.validators import DataRequired
 
+from app.access import access_context
+
 from . import ModelView
 
 
@@ -27,7 +29,7 @@ class RoleAdmin(ModelView):
     @property
     def can_edit(self):
         """Editing depends on role"""
-        is_admin = current_user.has_role("admin")
+        is_admin = access_context().is_admin
         is_active = current_user.is_active and current_user.is_authenticated
 
         if is_active and is_admin:
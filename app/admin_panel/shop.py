@@ -14,6 +14,7 @@ class ShopAdmin(ModeratorView):
     """Shop model view"""
 
     can_view_details = True
+    reference_data = True
     column_searchable_list = ("place_name", "address")
     column_labels = dict(
         place_name=gettext("Название"),
@@ -14,6 +14,7 @@ class ShopEquipmentAdmin(ModeratorView):
     """ShopEquipment model view"""
 
     can_view_details = True
+    loading_profile = ("shop",)
     column_searchable_list = ("coffee_machine",)
     column_labels = dict(
         coffee_machine=gettext("Кофе Машина"),
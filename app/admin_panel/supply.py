@@ -3,65 +3,38 @@ Module contains admin view for Supply model
 """
 
 from datetime import datetime
-from statistics import median, StatisticsError
 
 from flask import Markup, flash
 from flask_admin.babel import gettext
 from flask_security import current_user
-from sqlalchemy import func
 from wtforms import BooleanField, RadioField, SelectField
 from wtforms.validators import (DataRequired, InputRequired, NumberRange,
                                 Required)
 
-from app.models import Barista, Supply
+from app.models import Barista, StockLevel, Supply
 
-from . import StorageModeratorView, log
-from .exceptions import FailedUpdateException, QueryException
+from . import (CatalogMixin, StorageModeratorView, SummaryMixin,
+               list_product_amount, list_product_name, log)
+from .exceptions import FailedUpdateException
 
 
-class SupplyAdmin(StorageModeratorView):
+class SupplyAdmin(CatalogMixin, SummaryMixin, StorageModeratorView):
     """Supply model view"""
 
-    @staticmethod
-    def _list_amount(context, model, name):
-        del context, name
-        if not model.amount:
-            return ""
-        if model.product_name == "milk":
-            formatter = f"{model.amount} л"
-        elif (
-            model.product_name in ('coffee_arabika', 'coffee_blend')
-        ):
-            formatter = f"{model.amount} кг"
-        else:
-            formatter = f"{model.amount} шт."
-        return Markup(f"{formatter}")
-
-    @staticmethod
-    def _list_money(context, model, name):
-        del context, name
+    def _list_money(view, context, model, name):
+        del view, context, name
         if not model.money:
             return ""
         type_cost = "" if model.type_cost == "cash" else " (Безнал)"
         formatter = f"{model.money} грн.{type_cost}"
         return Markup(f"{formatter}")
 
-    @staticmethod
-    def _list_product_name(context, model, name):
-        del context, name
-        prettified = dict(
-            coffee_arabika=gettext("арабика"),
-            coffee_blend=gettext("купаж"),
-            milk=gettext("молоко"),
-            panini=gettext("панини"),
-            sausages=gettext("колбаски"),
-            buns=gettext("булочки"),
-        )
-        return Markup(f"{prettified[model.product_name]}")
-
     list_template = "admin/model/supply_list.html"
+    summary_fields = ("amount", "money")
     can_view_details = True
     can_set_page_size = True
+    keyset_pagination = True
+    loading_profile = ("storage.shop",)
     column_list = ("timestamp", "product_name", "amount", "money", "storage")
     column_labels = dict(
         name=gettext("Имя"),
@@ -99,9 +72,9 @@ class SupplyAdmin(StorageModeratorView):
     )
     column_formatters = dict(
         type_cost=lambda v, c, m, p: "Наличка" if m.type_cost == "cash" else "Безнал",
-        product_name=_list_product_name,
+        product_name=list_product_name,
         money=_list_money,
-        amount=_list_amount,
+        amount=list_product_amount,
     )
     form_args = dict(
         timestamp=dict(validators=[DataRequired()], format="%d.%m.%Y %H:%M"),
@@ -137,14 +110,6 @@ class SupplyAdmin(StorageModeratorView):
         ),
         product_name=SelectField(
             gettext("Название товара"),
-            choices=[
-                ("coffee_arabika", gettext("Арабика")),
-                ("coffee_blend", gettext("Купаж")),
-                ("milk", gettext("Молоко")),
-                ("panini", gettext("Панини")),
-                ("sausages", gettext("Колбаски")),
-                ("buns", gettext("Булочки")),
-            ],
             validators=[Required()],
         ),
     )
@@ -155,53 +120,6 @@ class SupplyAdmin(StorageModeratorView):
         "amount": {"placeholder": gettext("Количество в кг, л, и поштучно")},
     }
 
-    def sum_page(self, attr: str) -> int:
-        """Query sum on page"""
-        _query = self.get_model_data()
-        try:
-            return sum([p.__dict__[attr] for p in _query if p])
-        except (Exception, QueryException):
-            return 0
-
-    def sum_total(self, attr: str) -> int:
-        """Query total sum"""
-        _query = self.session.query(func.sum(Supply.__dict__[attr])).scalar()
-        try:
-            return _query
-        except (Exception, QueryException):
-            return 0
-
-    def median_page(self, attr: str) -> int:
-        """Query median on page"""
-        _query = self.get_model_data()
-        data = [p.__dict__[attr] for p in _query if p]
-        try:
-            return median(data)
-        except StatisticsError:
-            return 0
-
-    def median_total(self, attr: str) -> int:
-        """Query total median"""
-        _query = self.session.query(func.avg(Supply.__dict__[attr])).scalar()
-        try:
-            return round(_query)
-        except TypeError:
-            return 0
-
-    def render(self, template, **kwargs):
-        """Render template"""
-        _current_page = kwargs
-        kwargs["column_labels"] = self.column_labels
-        kwargs["summary_data"] = {"on_page": {}, "total": {}}
-        kwargs["median_data"] = {"on_page": {}, "total": {}}
-        render_fields = ("amount", "money")
-        for field in render_fields:
-            kwargs["summary_data"]["on_page"][field] = self.sum_page(field)
-            kwargs["summary_data"]["total"][field] = self.sum_total(field)
-            kwargs["median_data"]["on_page"][field] = self.median_page(field)
-            kwargs["median_data"]["total"][field] = self.median_total(field)
-        return super().render(template, **kwargs)
-
     def create_form(self, obj=None):
         """Before create form"""
         form = super().create_form(obj)
@@ -247,18 +165,9 @@ class SupplyAdmin(StorageModeratorView):
         """Work with model after create"""
         if form.backdating.data:
             return
-        if form.product_name.data == "coffee_blend":
-            model.storage.coffee_blend += float(form.amount.data)
-        elif form.product_name.data == "coffee_arabika":
-            model.storage.coffee_arabika += float(form.amount.data)
-        elif form.product_name.data == "milk":
-            model.storage.milk += float(form.amount.data)
-        elif form.product_name.data == "panini":
-            model.storage.panini += int(form.amount.data)
-        elif form.product_name.data == "sausages":
-            model.storage.sausages += int(form.amount.data)
-        else:
-            model.storage.buns += int(form.amount.data)
+        StockLevel.add(
+            model.storage.id, form.product_name.data, float(form.amount.data), "supply"
+        )
 
         if form.type_cost.data == "cash":
             model.storage.shop.cash -= form.money.data
@@ -276,18 +185,12 @@ class SupplyAdmin(StorageModeratorView):
             else:
                 model.storage.shop.cashless += form.money.data
 
-            if form.product_name.data == "coffee_blend":
-                model.storage.coffee_blend -= float(form.amount.data)
-            elif form.product_name.data == "coffee_arabika":
-                model.storage.coffee_arabika -= float(form.amount.data)
-            elif form.product_name.data == "milk":
-                model.storage.milk -= float(form.amount.data)
-            elif form.product_name.data == "panini":
-                model.storage.panini -= int(form.amount.data)
-            elif form.product_name.data == "sausages":
-                model.storage.sausages -= int(form.amount.data)
-            else:
-                model.storage.buns += int(form.amount.data)
+            StockLevel.add(
+                model.storage.id,
+                form.product_name.data,
+                -float(form.amount.data),
+                "supply",
+            )
 
             self.session.commit()
 
@@ -295,18 +198,7 @@ class SupplyAdmin(StorageModeratorView):
         """Work with model after delete"""
         if model.backdating:
             return
-        if model.product_name == "coffee_blend":
-            model.storage.coffee_blend -= model.amount
-        elif model.product_name == "coffee_arabika":
-            model.storage.coffee_arabika -= model.amount
-        elif model.product_name == "milk":
-            model.storage.milk -= model.amount
-        elif model.product_name == "panini":
-            model.storage.panini -= model.amount
-        elif model.product_name == "sausages":
-            model.storage.sausages -= model.amount
-        else:
-            model.storage.buns -= model.amount
+        StockLevel.add(model.storage.id, model.product_name, -model.amount, "supply")
 
         if model.type_cost == "cash":
             model.storage.shop.cash += model.money
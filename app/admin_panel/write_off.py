@@ -3,53 +3,29 @@ Module contains admin view for WriteOff model
 """
 
 from datetime import datetime
-from statistics import median, StatisticsError
 
-from flask import Markup, flash
+from flask import flash
 from flask_admin.babel import gettext
 from flask_security import current_user
-from sqlalchemy import func
 from wtforms import BooleanField, SelectField
 from wtforms.validators import DataRequired, NumberRange, Required
 
-from app.models import Barista, WriteOff
+from app.models import Barista, StockLevel, WriteOff
 
-from . import StorageModeratorView, log
-from .exceptions import FailedUpdateException, QueryException
+from . import (CatalogMixin, StorageModeratorView, SummaryMixin,
+               list_product_amount, list_product_name, log)
+from .exceptions import FailedUpdateException
 
 
-class WriteOffAdmin(StorageModeratorView):
+class WriteOffAdmin(CatalogMixin, SummaryMixin, StorageModeratorView):
     """WriteOff model view"""
 
-    @staticmethod
-    def _list_amount(context, model, name):
-        del context, name
-        if not model.amount:
-            return ""
-        if model.product_name == "milk":
-            formatter = f"{model.amount} л"
-        elif model.product_name in ("coffee_arabika", "coffee_blend"):
-            formatter = f"{model.amount} кг"
-        else:
-            formatter = f"{model.amount} шт."
-        return Markup(f"{formatter}")
-
-    @staticmethod
-    def _list_product_name(context, model, name):
-        del context, name
-        prettified = dict(
-            coffee_arabika=gettext("арабика"),
-            coffee_blend=gettext("купаж"),
-            milk=gettext("молоко"),
-            panini=gettext("панини"),
-            sausages=gettext("колбаски"),
-            buns=gettext("булочки"),
-        )
-        return Markup(f"{prettified[model.product_name]}")
-
     list_template = "admin/model/write_off_list.html"
+    summary_fields = ("amount",)
     can_view_details = True
     can_set_page_size = True
+    keyset_pagination = True
+    loading_profile = ("storage.shop",)
     column_list = ("timestamp", "product_name", "amount", "storage")
     column_labels = dict(
         timestamp=gettext("Дата"),
@@ -64,8 +40,8 @@ class WriteOffAdmin(StorageModeratorView):
     column_filters = ("timestamp", "product_name", Barista.name)
     column_formatters = dict(
         timestamp=lambda v, c, m, p: m.timestamp.date().strftime("%d.%m.%Y"),
-        product_name=_list_product_name,
-        amount=_list_amount,
+        product_name=list_product_name,
+        amount=list_product_amount,
     )
     form_create_rules = (
         "backdating",
@@ -101,14 +77,6 @@ class WriteOffAdmin(StorageModeratorView):
         backdating=BooleanField(gettext("Обработка задним числом")),
         product_name=SelectField(
             gettext("Название товара"),
-            choices=[
-                ("coffee_arabika", gettext("Арабика")),
-                ("coffee_blend", gettext("Купаж")),
-                ("milk", gettext("Молоко")),
-                ("panini", gettext("Панини")),
-                ("sausages", gettext("Колбаски")),
-                ("buns", gettext("Булочки")),
-            ],
             validators=[Required()],
         ),
     )
@@ -117,53 +85,6 @@ class WriteOffAdmin(StorageModeratorView):
         "amount": {"placeholder": gettext("Количество в кг, л, и поштучно")},
     }
 
-    def sum_page(self, attr: str) -> int:
-        """Query sum on page"""
-        _query = self.get_model_data()
-        try:
-            return sum([p.__dict__[attr] for p in _query if p])
-        except (Exception, QueryException):
-            return 0
-
-    def sum_total(self, attr: str) -> int:
-        """Query total sum"""
-        _query = self.session.query(func.sum(WriteOff.__dict__[attr])).scalar()
-        try:
-            return _query
-        except (Exception, QueryException):
-            return 0
-
-    def median_page(self, attr: str) -> int:
-        """Query median on page"""
-        _query = self.get_model_data()
-        data = [p.__dict__[attr] for p in _query if p]
-        try:
-            return median(data)
-        except StatisticsError:
-            return 0
-
-    def median_total(self, attr: str) -> int:
-        """Query total median"""
-        _query = self.session.query(func.avg(WriteOff.__dict__[attr])).scalar()
-        try:
-            return round(_query)
-        except TypeError:
-            return 0
-
-    def render(self, template, **kwargs):
-        """Render template"""
-        _current_page = kwargs
-        kwargs["column_labels"] = self.column_labels
-        kwargs["summary_data"] = {"on_page": {}, "total": {}}
-        kwargs["median_data"] = {"on_page": {}, "total": {}}
-        render_fields = ("amount",)
-        for field in render_fields:
-            kwargs["summary_data"]["on_page"][field] = self.sum_page(field)
-            kwargs["summary_data"]["total"][field] = self.sum_total(field)
-            kwargs["median_data"]["on_page"][field] = self.median_page(field)
-            kwargs["median_data"]["total"][field] = self.median_total(field)
-        return super().render(template, **kwargs)
-
     def create_form(self, obj=None):
         form = super().create_form(obj)
         form.timestamp.data = datetime.utcnow()
@@ -204,50 +125,27 @@ class WriteOffAdmin(StorageModeratorView):
         if form.backdating.data:
             model.backdating = form.backdating.data
             return
-        if form.product_name.data == "coffee_blend":
-            model.storage.coffee_blend -= float(form.amount.data)
-        elif form.product_name.data == "coffee_arabika":
-            model.storage.coffee_arabika -= float(form.amount.data)
-        elif form.product_name.data == "milk":
-            model.storage.milk -= float(form.amount.data)
-        elif form.product_name.data == "panini":
-            model.storage.panini -= int(form.amount.data)
-        elif form.product_name.data == "sausages":
-            model.storage.sausages -= int(form.amount.data)
-        else:
-            model.storage.buns -= int(form.amount.data)
+        StockLevel.add(
+            model.storage.id,
+            form.product_name.data,
+            -float(form.amount.data),
+            "write_off",
+        )
 
     def after_model_change(self, form, model, is_created):
         if form.backdating.data:
             return
         if not is_created:
             model.last_edit = datetime.utcnow()
-            if form.product_name.data == "coffee_blend":
-                model.storage.coffee_blend += float(form.amount.data)
-            elif form.product_name.data == "coffee_arabika":
-                model.storage.coffee_arabika += float(form.amount.data)
-            elif form.product_name.data == "milk":
-                model.storage.milk += float(form.amount.data)
-            elif form.product_name.data == "panini":
-                model.storage.panini += int(form.amount.data)
-            elif form.product_name.data == "sausages":
-                model.storage.sausages += int(form.amount.data)
-            else:
-                model.storage.buns += int(form.amount.data)
+            StockLevel.add(
+                model.storage.id,
+                form.product_name.data,
+                float(form.amount.data),
+                "write_off",
+            )
             self.session.commit()
 
     def on_model_delete(self, model):
         if model.backdating:
             return
-        if model.product_name == "coffee_blend":
-            model.storage.coffee_blend += model.amount
-        elif model.product_name == "coffee_arabika":
-            model.storage.coffee_arabika += model.amount
-        elif model.product_name == "milk":
-            model.storage.milk += model.amount
-        elif model.product_name == "panini":
-            model.storage.panini += model.amount
-        elif model.product_name == "sausages":
-            model.storage.sausages += model.amount
-        else:
-            model.storage.buns += model.amount
+        StockLevel.add(model.storage.id, model.product_name, model.amount, "write_off")
@@ -0,0 +1,167 @@
+"""
+Module contains batch import of offline transactions:
+expenses, by weights, write offs and supplies of one or more shops
+"""
+
+
+import csv
+import io
+from datetime import datetime
+
+from flask_babelex import _
+from werkzeug.datastructures import MultiDict
+
+from app import dashboard, db
+from app.access import access_context
+from app.business_logic import TransactionHandler, is_report_send_on
+from app.forms import ByWeightForm, ExpanseForm, SupplyForm, WriteOffForm
+from app.today import day_window, db_timestamp, local_day
+
+# record type -> (form, handler method, product choice field)
+BATCH_TYPES = {
+    "expense": (ExpanseForm, "create_expense", None),
+    "by_weight": (ByWeightForm, "crete_by_weight", "by_weight_choice"),
+    "write_off": (WriteOffForm, "create_write_off", "write_off_choice"),
+    "supply": (SupplyForm, "create_supply", "supply_choice"),
+}
+
+
+class BatchError(Exception):
+    """Batch has invalid records, errors by record number"""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def read_csv(stream) -> list:
+    """
+    Records from csv with header:
+    type, coffee_shop, type_cost, money, is_global, categories, product, amount,
+    timestamp; categories separated by ';'
+    """
+    records = []
+    for row in csv.DictReader(stream):
+        record = {k: v for k, v in row.items() if v not in (None, "")}
+        if "categories" in record:
+            record["categories"] = record["categories"].split(";")
+        if "is_global" in record:
+            record["is_global"] = record["is_global"].lower() in ("1", "true", "yes")
+        records.append(record)
+    return records
+
+
+def read_records(data, content_type="application/json") -> list:
+    """Records from json list or csv text"""
+    if "csv" in content_type:
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        return read_csv(io.StringIO(data))
+    if not isinstance(data, list):
+        raise BatchError({0: [_("Ожидается список записей")]})
+    return data
+
+
+def record_form(record):
+    """Form of record type filled from record, without csrf"""
+    form_class, _method, choice_field = BATCH_TYPES[record["type"]]
+    formdata = MultiDict()
+    for key, value in record.items():
+        if key in ("type", "timestamp"):
+            continue
+        if key == "product" and choice_field:
+            key = choice_field
+        if isinstance(value, bool):
+            if value:
+                formdata.add(key, "y")
+            continue
+        for item in value if isinstance(value, list) else [value]:
+            formdata.add(key, str(item))
+    return form_class(formdata=formdata, meta={"csrf": False})
+
+
+def record_timestamp(record):
+    """
+    Timestamp of record, naive ones are taken in shop time zone
+    :raise ValueError: on invalid format
+    """
+    timestamp = datetime.fromisoformat(str(record["timestamp"]))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=day_window().start.tzinfo)
+    return timestamp
+
+
+def validate_batch(records) -> list:
+    """
+    Validate records with form rules, shops of records must be work places
+    of current user, timestamps out of today's shop day need staff role
+    :return: list of (record, form)
+    :raise BatchError: when any record is invalid
+    """
+    access = access_context()
+    today = day_window()
+    errors = {}
+    validated = []
+    for number, record in enumerate(records, 1):
+        if not isinstance(record, dict) or record.get("type") not in BATCH_TYPES:
+            types = ", ".join(BATCH_TYPES)
+            errors[number] = [f"{_('Неизвестный тип записи')}: {types}"]
+            continue
+        form = record_form(record)
+        if not form.validate():
+            errors[number] = [
+                f"{field}: {message}"
+                for field, messages in form.errors.items()
+                for message in messages
+            ]
+            continue
+        if not access.works_at(form.coffee_shop.data):
+            errors[number] = [f"coffee_shop: {_('Нет доступа к кофейне')}"]
+            continue
+        if "timestamp" in record:
+            try:
+                timestamp = record_timestamp(record)
+            except ValueError:
+                errors[number] = [f"timestamp: {_('Неверный формат даты')}"]
+                continue
+            if not (access.is_staff or local_day(timestamp) == today.day):
+                errors[number] = [f"timestamp: {_('Дата вне текущего дня')}"]
+                continue
+        validated.append((record, form))
+    if errors:
+        raise BatchError(errors)
+    return validated
+
+
+def import_batch(records) -> int:
+    """
+    Validate records and apply them through TransactionHandler
+    in a single transaction, for current user
+    :return: created records count
+    :raise BatchError: when any record is invalid or shop report is sent
+    """
+    validated = validate_batch(records)
+    handlers = {}
+    errors = {}
+    with db.session.no_autoflush:
+        for number, (record, form) in enumerate(validated, 1):
+            shop_id = form.coffee_shop.data
+            if shop_id not in handlers:
+                handlers[shop_id] = TransactionHandler(shop_id, commit=False)
+            handler = handlers[shop_id]
+            handler.timestamp = None
+            day = day_window().day
+            if "timestamp" in record:
+                handler.timestamp = db_timestamp(record_timestamp(record))
+                day = local_day(handler.timestamp)
+            if is_report_send_on(shop_id, day):
+                errors[number] = [_("Отчет за день записи уже был отправлен!")]
+                continue
+            method = BATCH_TYPES[record["type"]][1]
+            getattr(handler, method)(form)
+    if errors:
+        db.session.rollback()
+        raise BatchError(errors)
+    db.session.commit()
+    dashboard.invalidate()
+    return len(validated)
@@ -3,21 +3,43 @@ Module define Transaction logic
 """
 
 
-from datetime import date, datetime
+from datetime import datetime
 
+from flask import abort, g
 from flask_security import current_user
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.sql import ClauseElement
 
-from app import app, db
-from app.models import (ByWeight, Category, Expense, Report, Shop,
-                        ShopEquipment, Storage, Supply, WriteOff)
+from app import app, dashboard, db, ledger
+from app.models import (REPORT_PRODUCTS, ByWeight, CashEntry, Category,
+                        CollectionFund, DepositFund, Expense, Report, Shop,
+                        StockLevel, Storage, Supply, TransferProduct,
+                        WriteOff)
+from app.today import day_window
+
+
+def reports_sent_today() -> dict:
+    """
+    Count today's reports of all shops with one grouped query,
+    cached for the current request
+    :return: dict shop_id -> reports count
+    """
+    if "reports_sent_today" not in g:
+        _query = db.session.query(Report.shop_id, func.count(Report.id))
+        _query = _query.filter(day_window().contains(Report.timestamp))
+        g.reports_sent_today = dict(_query.group_by(Report.shop_id).all())
+    return g.reports_sent_today
+
+
+def reset_reports_sent_today():
+    """Drop cached reports count, call after report created or deleted"""
+    g.pop("reports_sent_today", None)
 
 
 def transaction_count(shop_id: int) -> int:
-    """Lengths list reports by today"""
-    reports = Report.query.filter_by(shop_id=shop_id)
-    reports_today = reports.filter(func.date(Report.timestamp) == date.today()).all()
-    return len(reports_today)
+    """Count reports by today"""
+    return reports_sent_today().get(int(shop_id), 0)
 
 
 def is_report_send(shop_id: int) -> bool:
@@ -25,59 +47,219 @@ def is_report_send(shop_id: int) -> bool:
     return transaction_count(shop_id) >= app.config["REPORTS_PER_DAY"]
 
 
+def is_report_send_on(shop_id: int, day) -> bool:
+    """Check if report of shop day is sent, today's count is cached"""
+    if day == day_window().day:
+        return is_report_send(shop_id)
+    _query = Report.query.filter(
+        Report.shop_id == shop_id, day_window(day).contains(Report.timestamp)
+    )
+    return _query.count() >= app.config["REPORTS_PER_DAY"]
+
+
+def get_shop_context(shop_id):
+    """
+    Shop with storage and equipment loaded in one joined query,
+    cached for the current request
+    :return: Shop or None
+    """
+    try:
+        shop_id = int(shop_id)
+    except (TypeError, ValueError):
+        return None
+    shops = g.setdefault("shop_context", {})
+    if shop_id not in shops:
+        shops[shop_id] = (
+            Shop.query.options(
+                joinedload(Shop.storage).selectinload(Storage.stock_levels),
+                joinedload(Shop.shop_equipment),
+            )
+            .filter_by(id=shop_id)
+            .first()
+        )
+    return shops[shop_id]
+
+
+class ShopDay:
+    """Today's transactions of a single shop, grouped by type"""
+
+    def __init__(self):
+        self.local_expenses = []
+        self.global_expenses = []
+        self.supplies = []
+        self.by_weights = []
+        self.deposit_funds = []
+        self.collection_funds = []
+        self.write_offs = []
+        # pairs of (transfer, counterpart shop)
+        self.transfers = []
+
+
+def load_day_transactions(shops) -> dict:
+    """
+    Load today's transactions of all given shops,
+    one query per transaction type instead of one per shop
+    :param shops: iterable of Shop
+    :return: dict shop_id -> ShopDay
+    """
+    shop_by_id = {shop.id: shop for shop in shops}
+    days = {shop_id: ShopDay() for shop_id in shop_by_id}
+    if not days:
+        return days
+    shop_ids = list(days)
+
+    expenses = Expense.query.options(selectinload(Expense.categories))
+    expenses = expenses.filter(
+        Expense.shop_id.in_(shop_ids), day_window().contains(Expense.timestamp)
+    ).order_by(Expense.timestamp)
+    for expense in expenses:
+        if expense.is_global:
+            days[expense.shop_id].global_expenses.append(expense)
+        else:
+            days[expense.shop_id].local_expenses.append(expense)
+
+    for model, attr in (
+        (DepositFund, "deposit_funds"),
+        (CollectionFund, "collection_funds"),
+    ):
+        _query = model.query.options(joinedload(model.barista))
+        _query = _query.filter(model.shop_id.in_(shop_ids))
+        _query = _query.filter(day_window().contains(model.timestamp))
+        _query = _query.order_by(model.timestamp)
+        for record in _query:
+            getattr(days[record.shop_id], attr).append(record)
+
+    for model, attr in (
+        (Supply, "supplies"),
+        (ByWeight, "by_weights"),
+        (WriteOff, "write_offs"),
+    ):
+        _query = db.session.query(model, Storage.shop_id)
+        _query = _query.join(Storage, model.storage_id == Storage.id)
+        _query = _query.filter(Storage.shop_id.in_(shop_ids))
+        _query = _query.filter(day_window().contains(model.timestamp))
+        _query = _query.order_by(model.timestamp)
+        for record, shop_id in _query:
+            getattr(days[shop_id], attr).append(record)
+
+    for transfer in TransferProduct.get_on_day(shop_ids):
+        for shop_id in {transfer.where_shop_id, transfer.to_shop_id}:
+            if shop_id in days:
+                days[shop_id].transfers.append(
+                    (transfer, transfer.counterpart(shop_id))
+                )
+    return days
+
+
+class ReportSentError(Exception):
+    """Today's report of shop is already sent"""
+
+    def __str__(self):
+        return "Today's report of shop is already sent"
+
+
+def transfer_stock(where_shop_id, to_shop_id, product_name, amount):
+    """
+    Move product between storages of two shops in current transaction,
+    shops without storage are skipped. Shop rows are locked in ascending
+    id order, so opposite transfers of the same shops wait for each other
+    instead of deadlocking, and report creation, which locks its shop,
+    is finished before reports are counted
+    :raise ReportSentError: when report of either shop is sent today
+    """
+    shop_ids = sorted({where_shop_id, to_shop_id})
+    db.session.query(Shop.id).filter(Shop.id.in_(shop_ids)).order_by(
+        Shop.id
+    ).with_for_update().all()
+    reset_reports_sent_today()
+    if any(is_report_send(shop_id) for shop_id in shop_ids):
+        raise ReportSentError()
+    storages = Storage.query.filter(Storage.shop_id.in_(shop_ids)).all()
+    storage_ids = {storage.shop_id: storage.id for storage in storages}
+    for shop_id, delta in ((where_shop_id, -amount), (to_shop_id, amount)):
+        if shop_id in storage_ids:
+            StockLevel.add(storage_ids[shop_id], product_name, delta, "transfer")
+
+
 class TransactionHandler:
     """
     Transaction handler
-    Get shop, storage, equipment from shop_id
+    Get shop, storage, equipment from shop_id,
+    with commit=False records are left for caller to commit,
+    with timestamp set records, cash entries and stock movements are backdated
     """
 
-    def __init__(self, shop_id=None):
+    def __init__(self, shop_id=None, commit=True):
+        self.commit = commit
+        self.timestamp = None
         self.shop = self.get_shop_from_id(shop_id)
         self.storage = self.get_storage_from_id(shop_id)
         self.equipment = self.get_equipment_from_id(shop_id)
 
     @staticmethod
     def get_shop_from_id(shop_id):
-        """Query shop by shop id"""
-        query = Shop.query.filter_by(id=shop_id).first_or_404()
-        return query
+        """Shop by shop id from request shop context"""
+        shop = get_shop_context(shop_id)
+        if shop is None:
+            abort(404)
+        return shop
 
     @staticmethod
     def get_storage_from_id(shop_id):
-        """Query storage by shop id"""
-        query = Storage.query.filter_by(shop_id=shop_id).first_or_404()
-        return query
+        """Storage by shop id from request shop context"""
+        shop = TransactionHandler.get_shop_from_id(shop_id)
+        if shop.storage is None:
+            abort(404)
+        return shop.storage
 
     @staticmethod
     def get_equipment_from_id(shop_id):
-        """Query shop equipment by shop id"""
-        query = ShopEquipment.query.filter_by(shop_id=shop_id).first_or_404()
-        return query
+        """Shop equipment by shop id from request shop context"""
+        shop = TransactionHandler.get_shop_from_id(shop_id)
+        if shop.shop_equipment is None:
+            abort(404)
+        return shop.shop_equipment
 
     @staticmethod
     def is_report_send(shop_id: int) -> bool:
         """Check if report send and compare with config variable"""
         return transaction_count(shop_id) >= app.config["REPORTS_PER_DAY"]
 
-    def funds_expenditure(self, money, type_cost):
+    @staticmethod
+    def increment(record, column, delta):
+        """
+        Atomic change of record column,
+        flushed as UPDATE ... SET column = column + delta
+        """
+        current = record.__dict__.get(column)
+        if not isinstance(current, ClauseElement):
+            current = getattr(type(record), column)
+        setattr(record, column, current + delta)
+
+    def funds_expenditure(self, money, type_cost, reason):
         """Funds expenditure by type cost"""
-        if type_cost == "cash":
-            self.shop.cash -= money
-        else:
-            self.shop.cashless -= money
+        self.cash_flow(-money, type_cost, reason)
 
-    def cash_flow(self, money, type_cost):
-        """Cash flow by type cost"""
-        if type_cost == "cash":
-            self.shop.cash += money
-        else:
-            self.shop.cashless += money
+    def cash_flow(self, money, type_cost, reason):
+        """Cash flow by type cost, posted to cash ledger"""
+        column = "cash" if type_cost == "cash" else "cashless"
+        self.increment(self.shop, column, money)
+        CashEntry.post(self.shop, column, reason, money, self.timestamp)
 
-    @staticmethod
-    def write_to_db(record):
+    def storage_flow(self, product_name, amount, reason):
+        """Storage product flow, keyed update of stock level"""
+        StockLevel.add(self.storage.id, product_name, amount, reason, self.timestamp)
+
+    def write_to_db(self, record):
         """Write record to database"""
+        if self.timestamp is not None:
+            record.timestamp = self.timestamp
+            record.backdating = True
         db.session.add(record)
-        db.session.commit()
+        if self.commit:
+            db.session.commit()
+            dashboard.invalidate()
+        return record
 
     def create_expense(self, form):
         """Create expense transaction"""
@@ -85,23 +267,23 @@ class TransactionHandler:
             type_cost=form.type_cost.data,
             money=form.money.data,
             is_global=form.is_global.data,
+            shop=self.shop,
             barista=current_user,
         )
-        self.funds_expenditure(form.money.data, form.type_cost.data)
+        self.funds_expenditure(form.money.data, form.type_cost.data, "expense")
         for c_id in form.categories.data:
             category = Category.query.filter_by(id=c_id).first_or_404()
             expense.categories.append(category)
-        self.shop.expenses.append(expense)
-        self.write_to_db(expense)
+        return self.write_to_db(expense)
 
     def crete_by_weight(self, form):
         """Create by weight transaction"""
         if form.by_weight_choice.data == "coffee_blend":
-            self.storage.coffee_blend -= form.amount.data
+            self.storage_flow("coffee_blend", -form.amount.data, "by_weight")
         else:
-            self.storage.coffee_arabika -= form.amount.data
+            self.storage_flow("coffee_arabika", -form.amount.data, "by_weight")
 
-        self.cash_flow(form.money.data, form.type_cost.data)
+        self.cash_flow(form.money.data, form.type_cost.data, "by_weight")
         by_weight = ByWeight(
             storage=self.storage,
             amount=form.amount.data,
@@ -110,46 +292,23 @@ class TransactionHandler:
             money=form.money.data,
             barista=current_user,
         )
-        self.write_to_db(by_weight)
+        return self.write_to_db(by_weight)
 
     def create_write_off(self, form):
         """Create write off transaction"""
-        if form.write_off_choice.data == "coffee_blend":
-            self.storage.coffee_blend -= form.amount.data
-        elif form.write_off_choice.data == "coffee_arabika":
-            self.storage.coffee_arabika -= form.amount.data
-        elif form.write_off_choice.data == "milk":
-            self.storage.milk -= form.amount.data
-        elif form.write_off_choice.data == "panini":
-            self.storage.panini -= int(form.amount.data)
-        elif form.write_off_choice.data == "sausages":
-            self.storage.sausages -= int(form.amount.data)
-        else:
-            self.storage.buns -= int(form.amount.data)
+        self.storage_flow(form.write_off_choice.data, -form.amount.data, "write_off")
         write_off = WriteOff(
             storage=self.storage,
             amount=form.amount.data,
             product_name=form.write_off_choice.data,
             barista=current_user,
         )
-        self.write_to_db(write_off)
+        return self.write_to_db(write_off)
 
     def create_supply(self, form):
         """Create supply transaction"""
-        if form.supply_choice.data == "coffee_blend":
-            self.storage.coffee_blend += form.amount.data
-        elif form.supply_choice.data == "coffee_arabika":
-            self.storage.coffee_arabika += form.amount.data
-        elif form.supply_choice.data == "milk":
-            self.storage.milk += form.amount.data
-        elif form.supply_choice.data == "panini":
-            self.storage.panini += int(form.amount.data)
-        elif form.supply_choice.data == "sausages":
-            self.storage.sausages += int(form.amount.data)
-        else:
-            self.storage.buns += int(form.amount.data)
-
-        self.funds_expenditure(form.money.data, form.type_cost.data)
+        self.storage_flow(form.supply_choice.data, form.amount.data, "supply")
+        self.funds_expenditure(form.money.data, form.type_cost.data, "supply")
         supply = Supply(
             storage=self.storage,
             product_name=form.supply_choice.data,
@@ -158,14 +317,33 @@ class TransactionHandler:
             money=form.money.data,
             barista=current_user,
         )
-        self.write_to_db(supply)
+        return self.write_to_db(supply)
+
+    def create_transfer(self, form):
+        """Create transfer transaction from shop to other shop"""
+        amount = float(form.amount.data)
+        transfer_stock(
+            self.shop.id, form.from_choice.data, form.transfer_choice.data, amount
+        )
+        transfer = TransferProduct(
+            where_shop_id=self.shop.id,
+            to_shop_id=form.from_choice.data,
+            product_name=form.transfer_choice.data,
+            amount=amount,
+            barista=current_user,
+        )
+        return self.write_to_db(transfer)
 
     def create_report(self, form):
         """Create day report transaction"""
+        # report reads balances, lock shop and storage rows until commit
+        db.session.refresh(self.shop, with_for_update=True)
+        StockLevel.query.filter_by(
+            storage_id=self.storage.id
+        ).with_for_update().populate_existing().all()
         day_expanses = Expense.get_local(self.shop.id, True)
-        day_by_weight = ByWeight.get_local_by_shop(self.shop.id)
-        expanses = sum([e.money for e in day_expanses if e.type_cost == "cash"])
-        by_weight = sum([e.money for e in day_by_weight if e.type_cost == "cash"])
+        totals = ledger.day_totals(self.shop.id, day_window().day)
+        expanses, by_weight = totals["expense"], totals["by_weight"]
         last_actual_balance = self.shop.cash + expanses - by_weight
         cash_balance = form.actual_balance.data - last_actual_balance
         remainder_of_day = cash_balance + form.cashless.data
@@ -189,29 +367,20 @@ class TransactionHandler:
             buns=form.buns.data,
         )
         report.expenses = day_expanses.all()
-        self.cash_flow(cash_balance + expanses - by_weight, "cash")
-        self.cash_flow(form.cashless.data, "cashless")
-
-        def weight_amount(product_name):
-            weight = [w.amount for w in day_by_weight if w.product_name == product_name]
-            return sum(weight)
-
-        products = (
-            "coffee_arabika",
-            "coffee_blend",
-            "milk",
-            "panini",
-            "sausages",
-            "buns",
-        )
-        for i in products:
+        self.cash_flow(cash_balance + expanses - by_weight, "cash", "report")
+        self.cash_flow(form.cashless.data, "cashless", "report")
+
+        for i in REPORT_PRODUCTS:
             consumption_value = (
-                getattr(self.storage, i) - getattr(form, i).data + weight_amount(i)
+                self.storage.quantity(i)
+                - getattr(form, i).data
+                + totals["weights"].get(i, 0)
             )
             setattr(report, f"consumption_{i}", consumption_value)
-            consumption_to_storage = getattr(self.storage, i) - getattr(
+            consumption_to_storage = self.storage.quantity(i) - getattr(
                 report, f"consumption_{i}"
             )
-            setattr(self.storage, i, consumption_to_storage)
+            self.storage.set_quantity(i, consumption_to_storage, "report")
 
         self.write_to_db(report)
+        reset_reports_sent_today()
@@ -0,0 +1,98 @@
+"""
+Module contains process wide caches
+and slowly changing reference data: shops, categories, baristas, products
+"""
+
+
+from threading import Lock
+from time import monotonic
+
+from app import app
+from app.models import REPORT_PRODUCTS, Barista, Category, Product, Shop
+
+
+class TimedCache:
+    """
+    Process wide cache, entries expire after timeout seconds
+    taken from app config by timeout_config name
+    """
+
+    def __init__(self, timeout_config):
+        self.timeout_config = timeout_config
+        self._data = {}
+        self._lock = Lock()
+
+    def get(self, key, loader):
+        """Cached value by key, call loader when missing or expired"""
+        now = monotonic()
+        with self._lock:
+            cached = self._data.get(key)
+        if cached and now - cached[0] < app.config[self.timeout_config]:
+            return cached[1]
+        value = loader()
+        with self._lock:
+            self._data[key] = (now, value)
+        return value
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+
+reference_cache = TimedCache("REFERENCE_CACHE_TIMEOUT")
+
+
+def shop_choices(barista=None) -> list:
+    """
+    Shop choices (id, label) ordered by place name
+    :param barista: limit to barista work places, None for all shops
+    """
+    if barista is None or barista.has_administrative_rights:
+        key = ("shops", None)
+    else:
+        key = ("shops", barista.id)
+
+    def load():
+        _query = Shop.query if key[1] is None else Shop.get_barista_work(barista)
+        return [(s.id, str(s)) for s in _query.order_by(Shop.place_name)]
+
+    return reference_cache.get(key, load)
+
+
+def category_choices() -> list:
+    """Category choices (id, label)"""
+    return reference_cache.get(
+        ("categories",), lambda: [(c.id, str(c)) for c in Category.query.all()]
+    )
+
+
+def barista_choices() -> list:
+    """Barista choices (id, label)"""
+    return reference_cache.get(
+        ("baristas",), lambda: [(b.id, str(b)) for b in Barista.query.all()]
+    )
+
+
+def product_catalog() -> dict:
+    """Products of catalog by code: (label, unit, is_piece), in catalog order"""
+    return reference_cache.get(
+        ("catalog",),
+        lambda: {
+            p.name: (str(p), p.unit or "", bool(p.is_piece))
+            for p in Product.query.order_by(Product.id)
+        },
+    )
+
+
+def product_choices(weighed=False) -> list:
+    """
+    Product choices (code, label) of catalog
+    :param weighed: only products sold by weight, reports count them
+        among REPORT_PRODUCTS
+    """
+    return [
+        (name, label)
+        for name, (label, _unit, is_piece) in product_catalog().items()
+        if not (weighed and (is_piece or name not in REPORT_PRODUCTS))
+    ]
@@ -0,0 +1,142 @@
+"""
+Module keeps double-entry cash ledger of shops,
+end of day checkpoints and historical balances
+"""
+
+
+from datetime import datetime
+
+from sqlalchemy import case, event, func, inspect
+from sqlalchemy.sql import ClauseElement
+
+from app import db
+from app.models import CashCheckpoint, CashEntry, Shop
+from app.today import database_now, day_window, db_timestamp, local_day
+
+ACCOUNTS = ("cash", "cashless")
+OPENING = "opening"
+ADJUSTMENT = "adjustment"
+
+
+@event.listens_for(db.session, "before_flush")
+def post_balance_changes(session, flush_context, instances):
+    """
+    Post shop balances set through ORM, counter account is
+    session.info["cash_reason"] or adjustment
+    """
+    del flush_context, instances
+    reason = session.info.get("cash_reason", ADJUSTMENT)
+    for record in session.new:
+        if isinstance(record, Shop):
+            for account in ACCOUNTS:
+                CashEntry.post(record, account, OPENING, getattr(record, account))
+    for record in session.dirty:
+        if not isinstance(record, Shop) or not session.is_modified(record):
+            continue
+        for account in ACCOUNTS:
+            history = inspect(record).attrs[account].history
+            if not history.added or not history.deleted:
+                continue
+            new, old = history.added[0], history.deleted[0]
+            # atomic increments are posted by TransactionHandler
+            if isinstance(new, ClauseElement):
+                continue
+            CashEntry.post(record, account, reason, (new or 0) - (old or 0))
+
+
+def day_end(day) -> datetime:
+    """Start of the next shop day, checkpoint of day covers entries before it"""
+    return day_window(day).end
+
+
+def balance_at(shop_id, moment) -> dict:
+    """
+    Shop accounts balance at moment from latest checkpoint before it
+    plus entries after the checkpoint
+    :return: dict account -> balance
+    """
+    checkpoint = (
+        CashCheckpoint.query.filter(
+            CashCheckpoint.shop_id == shop_id, CashCheckpoint.day < local_day(moment)
+        )
+        .order_by(CashCheckpoint.day.desc())
+        .first()
+    )
+    balance = dict.fromkeys(ACCOUNTS, 0)
+    entries = CashEntry.query.filter(
+        CashEntry.shop_id == shop_id, CashEntry.timestamp < db_timestamp(moment)
+    )
+    if checkpoint:
+        balance.update(cash=checkpoint.cash, cashless=checkpoint.cashless)
+        entries = entries.filter(
+            CashEntry.timestamp >= db_timestamp(day_end(checkpoint.day))
+        )
+    for account in ACCOUNTS:
+        balance[account] += (
+            entries.with_entities(
+                func.coalesce(
+                    func.sum(
+                        case(
+                            (CashEntry.debit == account, CashEntry.amount),
+                            (CashEntry.credit == account, -CashEntry.amount),
+                            else_=0,
+                        )
+                    ),
+                    0,
+                )
+            ).scalar()
+            or 0
+        )
+    return balance
+
+
+def day_entries(shop_id, day) -> list:
+    """Entries of shop in shop day, in posting order"""
+    return (
+        CashEntry.query.filter(
+            CashEntry.shop_id == shop_id, day_window(day).contains(CashEntry.timestamp)
+        )
+        .order_by(CashEntry.timestamp, CashEntry.id)
+        .all()
+    )
+
+
+def take_checkpoints(day) -> int:
+    """
+    Write end of day balances of every shop, replace existing ones
+    :return: checkpoints count
+    """
+    CashCheckpoint.query.filter_by(day=day).delete()
+    rows = []
+    for (shop_id,) in db.session.query(Shop.id):
+        balance = balance_at(shop_id, day_end(day))
+        rows.append(dict(shop_id=shop_id, day=day, **balance))
+    db.session.bulk_insert_mappings(CashCheckpoint, rows)
+    db.session.commit()
+    return len(rows)
+
+
+def reconcile(repair=False) -> list:
+    """
+    Compare shop balances with cash ledger
+    :param repair: post adjustment entries for the differences
+    :return: list of (shop, account, shop balance, ledger balance) that differ
+    """
+    shops = Shop.query.order_by(Shop.id)
+    if repair:
+        # writers change balance and ledger together, hold them off
+        shops = shops.with_for_update().populate_existing()
+    shops = shops.all()
+    now = database_now()
+    drifts = []
+    for shop in shops:
+        balance = balance_at(shop.id, now)
+        for account in ACCOUNTS:
+            actual = getattr(shop, account) or 0
+            if actual != balance[account]:
+                drifts.append((shop, account, actual, balance[account]))
+    if repair and drifts:
+        for shop, account, actual, expected in drifts:
+            CashEntry.post(shop, account, ADJUSTMENT, actual - expected)
+        db.session.commit()
+    return drifts
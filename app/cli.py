@@ -3,14 +3,20 @@ This module contains app commands
 """
 
 
+import json
 import os
-from datetime import datetime
+import re
+from datetime import date, datetime
+from statistics import median
+from time import perf_counter
 
 import click
+from flask_login import login_user
 from werkzeug.security import generate_password_hash
 
-from app import app, db, user_datastore
-from app.models import Barista, Category, Role
+from app import app, batch, cash_ledger, db, ledger, stock, user_datastore
+from app.models import Barista, Category, Product, Role
+from app.today import day_window
 
 
 @app.cli.group()
@@ -55,6 +61,28 @@ def categories():
     click.echo(f"Create categories:  {categories_names}")
 
 
+@create.command()
+def products():
+    """
+    Create base product catalog
+    """
+    db.create_all()
+    catalog = (
+        ("coffee_arabika", "Арабика", "кг", False),
+        ("coffee_blend", "Купаж", "кг", False),
+        ("milk", "Молоко", "л", False),
+        ("panini", "Панини", "шт.", True),
+        ("sausages", "Колбаски", "шт.", True),
+        ("buns", "Булочки", "шт.", True),
+    )
+    for name, title, unit, is_piece in catalog:
+        if Product.query.filter_by(name=name).first() is None:
+            product = Product(name=name, title=title, unit=unit, is_piece=is_piece)
+            db.session.add(product)
+    db.session.commit()
+    click.echo(f"Create products: {', '.join(c[0] for c in catalog)}")
+
+
 @create.command()
 @click.argument("username")
 @click.argument("password")
@@ -77,6 +105,163 @@ def superuser(username, password):
     click.echo(f"Create superuser with name: {name}")
 
 
+@app.cli.group("ledger")
+def ledger_group():
+    """Daily shop ledger commands."""
+    pass
+
+
+@ledger_group.command()
+def rebuild():
+    """Rebuild daily shop ledger from all transactions."""
+    rows = ledger.rebuild()
+    click.echo(f"Daily shop ledger rebuilt: {rows} rows.")
+
+
+@ledger_group.command("check")
+@click.option("--day", default=None, help="Day YYYY-MM-DD, today by default.")
+def ledger_check(day):
+    """Compare daily shop ledger with transactions of day."""
+    day = date.fromisoformat(day) if day else day_window().day
+    drifts = ledger.check(day)
+    for shop_id, total, recorded, actual in drifts:
+        click.echo(f"Shop {shop_id} / {total}: {recorded} != {actual}")
+    click.echo(f"Ledger totals out of transactions for {day}: {len(drifts)}.")
+
+
+@app.cli.group("stock")
+def stock_group():
+    """Stock journal commands."""
+    pass
+
+
+@stock_group.command()
+@click.option("--day", default=None, help="Day YYYY-MM-DD, today by default.")
+def snapshot(day):
+    """Write end of day stock snapshots of all storages."""
+    day = date.fromisoformat(day) if day else day_window().day
+    rows = stock.take_snapshots(day)
+    click.echo(f"Stock snapshots for {day}: {rows} rows.")
+
+
+@stock_group.command()
+@click.option("--repair", is_flag=True, help="Set stock levels to journal values.")
+def check(repair):
+    """Compare stock levels with stock journal."""
+    drifts = stock.check(repair)
+    for level, expected in drifts:
+        click.echo(f"{level.storage} / {level.product}: {level.qty} != {expected}")
+    click.echo(f"Stock levels out of journal: {len(drifts)}.")
+
+
+@app.cli.group("cash")
+def cash_group():
+    """Cash ledger commands."""
+    pass
+
+
+@cash_group.command()
+@click.option("--day", default=None, help="Day YYYY-MM-DD, today by default.")
+def checkpoint(day):
+    """Write end of day cash checkpoints of all shops."""
+    day = date.fromisoformat(day) if day else day_window().day
+    rows = cash_ledger.take_checkpoints(day)
+    click.echo(f"Cash checkpoints for {day}: {rows} rows.")
+
+
+@cash_group.command()
+@click.option("--repair", is_flag=True, help="Post adjustments for differences.")
+def reconcile(repair):
+    """Compare shop balances with cash ledger."""
+    drifts = cash_ledger.reconcile(repair)
+    for shop, account, actual, expected in drifts:
+        click.echo(f"{shop} / {account}: {actual} != {expected}")
+    click.echo(f"Shop balances out of ledger: {len(drifts)}.")
+
+
+@cash_group.command()
+@click.argument("shop_id", type=int)
+@click.argument("day")
+def replay(shop_id, day):
+    """Print cash ledger entries of shop in day."""
+    day = date.fromisoformat(day)
+    for entry in cash_ledger.day_entries(shop_id, day):
+        click.echo(
+            f"{entry.timestamp:%H:%M:%S} {entry.debit} <- {entry.credit} {entry.amount}"
+        )
+    balance = cash_ledger.balance_at(shop_id, cash_ledger.day_end(day))
+    click.echo(f"End of day: cash {balance['cash']}, cashless {balance['cashless']}")
+
+
+@app.cli.group("batch")
+def batch_group():
+    """Offline transactions batch commands."""
+    pass
+
+
+@batch_group.command("import")
+@click.argument("path", type=click.File(encoding="utf-8"))
+@click.argument("username")
+def import_batch(path, username):
+    """
+    Import json or csv batch of transactions in one transaction
+    :param path: batch file, csv by .csv extension, json otherwise
+    :param username: barista name, transactions author
+    """
+    user = Barista.query.filter_by(name=username).first()
+    if user is None:
+        raise click.ClickException(f"User {username} not found")
+    if path.name.endswith(".csv"):
+        data, content_type = path.read(), "text/csv"
+    else:
+        data, content_type = json.load(path), "application/json"
+    with app.test_request_context():
+        login_user(user)
+        try:
+            created = batch.import_batch(batch.read_records(data, content_type))
+        except batch.BatchError as error:
+            for number, messages in error.errors.items():
+                click.echo(f"#{number}: {'; '.join(messages)}", err=True)
+            raise click.ClickException("Batch rejected, nothing imported") from error
+    click.echo(f"Imported {created} records.")
+
+
+@app.cli.group("bench")
+def bench_group():
+    """Page benchmark commands."""
+    pass
+
+
+@bench_group.command()
+@click.argument("path")
+@click.argument("username")
+@click.option("--repeat", default=10, help="Requests count.")
+def page(path, username, repeat):
+    """Median time and queries count of page requested by user."""
+    user = Barista.query.filter_by(name=username).first()
+    if user is None:
+        raise click.ClickException(f"User {username} not found")
+    app.config["SERVER_TIMING_HEADER"] = True
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.id)
+        session["_fresh"] = True
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        response = client.get(path)
+        elapsed = (perf_counter() - start) * 1000
+        server_timing = response.headers.get("Server-Timing", "")
+        match = re.search(r'dur=([\d.]+);desc="(\d+) queries"', server_timing)
+        db_time, queries = (float(match[1]), int(match[2])) if match else (0.0, 0)
+        timings.append((elapsed, db_time, queries))
+    elapsed, db_time, queries = (median(column) for column in zip(*timings))
+    click.echo(
+        f"{path} {response.status_code}: {elapsed:.1f}ms, "
+        f"db {db_time:.1f}ms, {queries:g} queries (median of {repeat})"
+    )
+
+
 @app.cli.group()
 def translate():
     """Translation and localization commands."""
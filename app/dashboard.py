@@ -0,0 +1,74 @@
+"""
+Module contains dashboard aggregation service,
+shop balances and expenses totals for admin index view
+"""
+
+
+from sqlalchemy import func
+
+from app import db
+from app.cache import TimedCache
+from app.models import DailyShopLedger, Shop
+
+_cache = TimedCache("DASHBOARD_CACHE_TIMEOUT")
+
+
+def invalidate():
+    """Drop cached totals, call after any money movement"""
+    _cache.clear()
+
+
+def shop_totals(shop_ids=None) -> dict:
+    """
+    Sum cash and cashless of shops
+    :param shop_ids: shops scope, None for all shops
+    """
+    _query = db.session.query(
+        func.coalesce(func.sum(Shop.cash), 0),
+        func.coalesce(func.sum(Shop.cashless), 0),
+    )
+    if shop_ids is not None:
+        _query = _query.filter(Shop.id.in_(shop_ids))
+    cash, cashless = _query.one()
+    return {"cash": cash, "cashless": cashless}
+
+
+def expense_totals(shop_ids=None) -> dict:
+    """
+    Sum expenses and supplies money by type cost from daily ledger
+    :param shop_ids: shops scope, None for all shops
+    """
+    _query = db.session.query(
+        DailyShopLedger.type_cost,
+        func.coalesce(func.sum(DailyShopLedger.expense + DailyShopLedger.supply), 0),
+    ).filter(DailyShopLedger.type_cost.in_(("cash", "cashless")))
+    if shop_ids is not None:
+        _query = _query.filter(DailyShopLedger.shop_id.in_(shop_ids))
+    totals = {"cash": 0, "cashless": 0}
+    totals.update(_query.group_by(DailyShopLedger.type_cost).all())
+    return totals
+
+
+def dashboard_totals(shop_ids=None) -> dict:
+    """
+    Totals for admin index view, cached per shops scope
+    until invalidate() or DASHBOARD_CACHE_TIMEOUT seconds
+    :param shop_ids: shops scope, None for all shops
+    """
+    key = None if shop_ids is None else tuple(sorted(shop_ids))
+    return _cache.get(key, lambda: _totals(shop_ids))
+
+
+def _totals(shop_ids) -> dict:
+    """Uncached dashboard totals"""
+    shops = shop_totals(shop_ids)
+    expenses = expense_totals(shop_ids)
+    totals = {
+        "shop_cash": shops["cash"],
+        "shop_cashless": shops["cashless"],
+        "exp_cash": expenses["cash"],
+        "exp_cashless": expenses["cashless"],
+    }
+    totals["all_shop"] = totals["shop_cash"] + totals["shop_cashless"]
+    totals["all_exp"] = totals["exp_cash"] + totals["exp_cashless"]
+    return totals
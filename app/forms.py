@@ -14,7 +14,10 @@ from wtforms import (BooleanField, DecimalField, IntegerField, PasswordField,
 from wtforms.validators import (DataRequired, Email, EqualTo, InputRequired,
                                 Length, NumberRange, Required, ValidationError)
 
-from app.models import Barista, Category, Shop
+from app.business_logic import get_shop_context
+from app.cache import (barista_choices, category_choices, product_choices,
+                       shop_choices)
+from app.models import Barista
 
 
 class MyFloatField(DecimalField):
@@ -54,7 +57,9 @@ class ActualBalanceValidator:
     def __call__(self, form, field):
         form_cash = field.data
         shop_id = getattr(form, self.target_shop).data
-        shop = Shop.query.filter_by(id=shop_id).first()
+        shop = get_shop_context(shop_id)
+        if shop is None:
+            raise ValidationError(_l("Выберите кофейню"))
         cash = form_cash - shop.cash
         if cash < 0:
             raise ValidationError(self.message)
@@ -86,7 +91,7 @@ class RegistrationForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.work_place.choices = [(s.id, s) for s in Shop.query.all()]
+        self.work_place.choices = shop_choices()
 
     @staticmethod
     def validate_name(name):
@@ -197,10 +202,8 @@ class ExpanseForm(FlaskForm):
         if current_user.is_anonymous:
             self.coffee_shop.choices = []
         else:
-            self.coffee_shop.choices = [
-                (c.id, c) for c in Shop.get_barista_work(current_user).all()
-            ]
-        self.categories.choices = [(c.id, c) for c in Category.query.all()]
+            self.coffee_shop.choices = shop_choices(current_user)
+        self.categories.choices = category_choices()
 
 
 class ByWeightForm(FlaskForm):
@@ -246,9 +249,7 @@ class ByWeightForm(FlaskForm):
         if current_user.is_anonymous:
             self.coffee_shop.choices = []
         else:
-            self.coffee_shop.choices = [
-                (c.id, c) for c in Shop.get_barista_work(current_user).all()
-            ]
+            self.coffee_shop.choices = shop_choices(current_user)
 
 
 class WriteOffForm(FlaskForm):
@@ -286,9 +287,8 @@ class WriteOffForm(FlaskForm):
         if current_user.is_anonymous:
             self.coffee_shop.choices = []
         else:
-            self.coffee_shop.choices = [
-                (c.id, c) for c in Shop.get_barista_work(current_user).all()
-            ]
+            self.coffee_shop.choices = shop_choices(current_user)
+        self.write_off_choice.choices = product_choices()
 
 
 class SupplyForm(FlaskForm):
@@ -329,18 +329,43 @@ class SupplyForm(FlaskForm):
         if current_user.is_anonymous:
             self.coffee_shop.choices = []
         else:
-            self.coffee_shop.choices = [
-                (c.id, c) for c in Shop.get_barista_work(current_user).all()
-            ]
+            self.coffee_shop.choices = shop_choices(current_user)
+        self.supply_choice.choices = product_choices()
 
 
 class TransferForm(FlaskForm):
     """Transfer form"""
 
-    where_choice = SelectField(_l("Откуда"))
-    from_choice = SelectField(_l("Куда"))
+    where_choice = SelectField(_l("Откуда"), coerce=int)
+    from_choice = SelectField(_l("Куда"), coerce=int)
+    transfer_choice = SelectField(_l("Выбор товара"), validators=[Required()])
+    amount = MyFloatField(
+        _l("Количество"),
+        default=0.0,
+        validators=[
+            DataRequired(),
+            NumberRange(
+                min=0.0001,
+                message=_l("Количество не может быть нулевым, либо ниже нуля"),
+            ),
+        ],
+    )
     submit = SubmitField(_l("Отправить"))
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if current_user.is_anonymous:
+            self.where_choice.choices = []
+        else:
+            self.where_choice.choices = shop_choices(current_user)
+        self.from_choice.choices = shop_choices()
+        self.transfer_choice.choices = product_choices()
+
+    def validate_from_choice(self, from_choice):
+        """Transfer goes to other shop"""
+        if from_choice.data == self.where_choice.data:
+            raise ValidationError(_("Выберите другую кофейню"))
+
 
 class ReportForm(FlaskForm):
     """Daily report form"""
@@ -444,9 +469,7 @@ class ReportForm(FlaskForm):
         if current_user.is_anonymous:
             self.shop.choices = []
         else:
-            self.shop.choices = [
-                (c.id, c) for c in Shop.get_barista_work(current_user).all()
-            ]
+            self.shop.choices = shop_choices(current_user)
 
 
 class CoffeeShopForm(FlaskForm):
@@ -550,4 +573,4 @@ class CoffeeShopForm(FlaskForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.staff_list.choices = [(s.id, s) for s in Barista.query.all()]
+        self.staff_list.choices = barista_choices()
@@ -0,0 +1,424 @@
+"""
+Module keeps daily shop ledger in sync with transactions,
+incremental updates on flush and full rebuild
+"""
+
+
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import case, event, func, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.models import (REPORT_PRODUCTS, ByWeight, CollectionFund,
+                        DailyProductLedger, DailyShopLedger, DepositFund,
+                        Expense, Shop, Storage, Supply, WriteOff)
+from app.today import day_window, local_date, local_day
+
+LEDGER_COLUMNS = (
+    "expense",
+    "local_expense",
+    "supply",
+    "by_weight",
+    "deposit_fund",
+    "collection_fund",
+) + REPORT_PRODUCTS
+STOCK = "stock"
+# dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# attributes ledger entries are read from
+ENTRY_ATTRIBUTES = (
+    "timestamp",
+    "type_cost",
+    "money",
+    "is_global",
+    "product_name",
+    "amount",
+    "shop",
+    "shop_id",
+    "storage",
+    "storage_id",
+)
+
+# model -> (money column in ledger, product delta sign)
+LEDGER_MODELS = {
+    Expense: ("expense", 0),
+    Supply: ("supply", 1),
+    ByWeight: ("by_weight", -1),
+    WriteOff: (None, -1),
+    DepositFund: ("deposit_fund", 0),
+    CollectionFund: ("collection_fund", 0),
+}
+
+
+def _as_date(value):
+    """Date from func.date() result, string on SQLite"""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _day_group(column):
+    """
+    Group by expression of shop day and converter of its values,
+    rows are grouped by timestamp and converted by local_day, as
+    incremental updates are, where database can't convert time zone
+    """
+    day = local_date(column)
+    if day is None:
+        return column, local_day
+    return day, _as_date
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    """Set listener loading value before change into attribute history"""
+    del target, value, oldvalue, initiator
+
+
+def _track_changes(model):
+    """Load committed values of entry attributes when they are changed"""
+    for key in ENTRY_ATTRIBUTES:
+        if hasattr(model, key):
+            event.listen(
+                getattr(model, key), "set", _keep_old_value, active_history=True
+            )
+
+
+for _model in LEDGER_MODELS:
+    _track_changes(_model)
+
+
+def _attr_value(record, key, old=False):
+    """
+    Current attribute value, with old=True value of committed state,
+    None when attribute was never set
+    """
+    state = inspect(record)
+    attr = state.attrs[key]
+    # not loaded attribute is not changed, its value is committed one
+    if not old or key in state.unloaded:
+        return attr.value
+    history = attr.history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+def _shop_id(record, old=False):
+    """Shop id of transaction record"""
+    if hasattr(record, "storage_id"):
+        storage = _attr_value(record, "storage", old)
+        if storage is not None:
+            return storage.shop_id
+        storage_id = _attr_value(record, "storage_id", old)
+        storage = Storage.query.get(storage_id) if storage_id else None
+        return storage.shop_id if storage else None
+    shop = _attr_value(record, "shop", old)
+    if shop is not None:
+        return shop.id
+    return _attr_value(record, "shop_id", old)
+
+
+def _day(record, old=False):
+    """Shop day of transaction record, today for records not flushed yet"""
+    timestamp = _attr_value(record, "timestamp", old)
+    if isinstance(timestamp, datetime):
+        return local_day(timestamp)
+    return day_window().day
+
+
+def ledger_entry(record, old=False):
+    """
+    Ledger key and column deltas of a transaction record
+    :return: ((shop_id, day, type_cost), {column: delta}) or None
+    """
+    money_column, product_sign = LEDGER_MODELS[type(record)]
+    shop_id = _shop_id(record, old)
+    if shop_id is None:
+        return None
+    day = _day(record, old)
+    deltas = {}
+    if money_column:
+        type_cost = _attr_value(record, "type_cost", old)
+        deltas[money_column] = _attr_value(record, "money", old) or 0
+    else:
+        type_cost = STOCK
+    if isinstance(record, Expense) and not _attr_value(record, "is_global", old):
+        deltas["local_expense"] = deltas[money_column]
+    if product_sign:
+        product_name = _attr_value(record, "product_name", old)
+        if product_name in REPORT_PRODUCTS:
+            amount = _attr_value(record, "amount", old) or 0
+            deltas[product_name] = product_sign * float(amount)
+    return (shop_id, day, type_cost), deltas
+
+
+def product_entry(record, old=False):
+    """
+    Product ledger key and amount of a by weight record
+    :return: ((shop_id, day, product_name), amount) or None
+    """
+    shop_id = _shop_id(record, old)
+    if shop_id is None:
+        return None
+    product_name = _attr_value(record, "product_name", old)
+    amount = float(_attr_value(record, "amount", old) or 0)
+    return (shop_id, _day(record, old), product_name), amount
+
+
+def upsert(session, model, key, deltas, defaults):
+    """
+    Atomic add of deltas to row of model by unique key, row created when
+    missing: INSERT ... ON CONFLICT DO UPDATE SET column = column + delta,
+    UPDATE with insert on miss for databases without upsert
+    :param key: dict of unique key columns
+    :param defaults: column values of new row besides key and deltas
+    """
+    table = model.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in UPSERT_DIALECTS:
+        statement = UPSERT_DIALECTS[dialect](table).values(
+            **{**defaults, **deltas, **key}
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                column: table.c[column] + statement.excluded[column]
+                for column in deltas
+            },
+        )
+        session.execute(statement)
+        return
+    updated = session.execute(
+        table.update()
+        .where(*[table.c[column] == value for column, value in key.items()])
+        .values({column: table.c[column] + delta for column, delta in deltas.items()})
+    )
+    if not updated.rowcount:
+        session.execute(table.insert().values(**{**defaults, **deltas, **key}))
+
+
+def apply_product_deltas(session, changes):
+    """
+    Add by weight amounts to product ledger rows, create missing rows
+    :param changes: dict (shop_id, day, product_name) -> amount
+    """
+    for (shop_id, day, product_name), amount in changes.items():
+        if not amount:
+            continue
+        key = dict(shop_id=shop_id, day=day, product_name=product_name)
+        upsert(session, DailyProductLedger, key, {"by_weight": amount}, {})
+
+
+def apply_deltas(session, changes):
+    """
+    Add column deltas to ledger rows, create missing rows
+    :param changes: dict (shop_id, day, type_cost) -> {column: delta}
+    """
+    defaults = dict.fromkeys(LEDGER_COLUMNS, 0)
+    for (shop_id, day, type_cost), deltas in changes.items():
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if not deltas:
+            continue
+        key = dict(shop_id=shop_id, day=day, type_cost=type_cost)
+        upsert(session, DailyShopLedger, key, deltas, defaults)
+
+
+@event.listens_for(db.session, "before_flush")
+def update_ledger(session, flush_context, instances):
+    """Collect ledger deltas of pending transaction changes"""
+    del flush_context, instances
+    deleted_shops = {obj.id for obj in session.deleted if isinstance(obj, Shop)}
+    changes = defaultdict(lambda: defaultdict(int))
+    product_changes = defaultdict(float)
+
+    def collect(record, sign, old):
+        entry = ledger_entry(record, old)
+        if entry is None or entry[0][0] in deleted_shops:
+            return
+        key, deltas = entry
+        for column, delta in deltas.items():
+            changes[key][column] += sign * delta
+        if isinstance(record, ByWeight):
+            key, amount = product_entry(record, old)
+            product_changes[key] += sign * amount
+
+    for record in session.new:
+        if type(record) in LEDGER_MODELS:
+            collect(record, 1, False)
+    for record in session.deleted:
+        if type(record) in LEDGER_MODELS:
+            collect(record, -1, True)
+    for record in session.dirty:
+        if type(record) in LEDGER_MODELS and session.is_modified(record):
+            collect(record, -1, True)
+            collect(record, 1, False)
+    apply_deltas(session, changes)
+    apply_product_deltas(session, product_changes)
+
+
+def _grouped_rows(model, money_column, product_sign):
+    """Aggregate one transaction table by shop, day, type cost and product"""
+    day, to_day = _day_group(model.timestamp)
+    columns = [day]
+    if hasattr(model, "storage_id"):
+        columns.insert(0, Storage.shop_id)
+    else:
+        columns.insert(0, model.shop_id)
+    group_by = list(columns)
+    if money_column:
+        columns.append(model.type_cost)
+        group_by.append(model.type_cost)
+    if product_sign:
+        columns.append(model.product_name)
+        group_by.append(model.product_name)
+    aggregates = []
+    if money_column:
+        aggregates.append(func.coalesce(func.sum(model.money), 0))
+    if product_sign:
+        aggregates.append(func.coalesce(func.sum(model.amount), 0))
+    if model is Expense:
+        local_money = case((model.is_global.is_(True), 0), else_=model.money)
+        aggregates.append(func.coalesce(func.sum(local_money), 0))
+    _query = db.session.query(*columns, *aggregates)
+    if hasattr(model, "storage_id"):
+        _query = _query.join(Storage, model.storage_id == Storage.id)
+    for row in _query.group_by(*group_by):
+        row = list(row)
+        shop_id, row_day = row.pop(0), row.pop(0)
+        row_day = to_day(row_day) if row_day is not None else None
+        type_cost = row.pop(0) if money_column else STOCK
+        product_name = row.pop(0) if product_sign else None
+        deltas = {}
+        if money_column:
+            deltas[money_column] = row.pop(0)
+        if product_sign:
+            amount = float(row.pop(0))
+            if product_name in REPORT_PRODUCTS:
+                deltas[product_name] = product_sign * amount
+        if model is Expense:
+            deltas["local_expense"] = row.pop(0)
+        yield (shop_id, row_day, type_cost), deltas
+
+
+def _product_rows():
+    """Aggregate by weight amounts by shop, day and product"""
+    day, to_day = _day_group(ByWeight.timestamp)
+    _query = (
+        db.session.query(
+            Storage.shop_id,
+            day,
+            ByWeight.product_name,
+            func.coalesce(func.sum(ByWeight.amount), 0),
+        )
+        .join(Storage, ByWeight.storage_id == Storage.id)
+        .group_by(Storage.shop_id, day, ByWeight.product_name)
+    )
+    amounts = defaultdict(float)
+    for shop_id, row_day, product_name, amount in _query:
+        if shop_id is None or row_day is None:
+            continue
+        amounts[shop_id, to_day(row_day), product_name] += float(amount)
+    for (shop_id, row_day, product_name), amount in amounts.items():
+        yield dict(
+            shop_id=shop_id, day=row_day, product_name=product_name, by_weight=amount
+        )
+
+
+def rebuild():
+    """Drop ledger rows and aggregate them again from transaction tables"""
+    DailyShopLedger.query.delete()
+    changes = defaultdict(lambda: defaultdict(int))
+    for model, (money_column, product_sign) in LEDGER_MODELS.items():
+        for key, deltas in _grouped_rows(model, money_column, product_sign):
+            for column, delta in deltas.items():
+                changes[key][column] += delta
+    rows = []
+    for (shop_id, day, type_cost), deltas in changes.items():
+        if shop_id is None or day is None:
+            continue
+        row = dict.fromkeys(LEDGER_COLUMNS, 0)
+        row.update(deltas)
+        row.update(shop_id=shop_id, day=day, type_cost=type_cost)
+        rows.append(row)
+    db.session.bulk_insert_mappings(DailyShopLedger, rows)
+    DailyProductLedger.query.delete()
+    db.session.bulk_insert_mappings(DailyProductLedger, list(_product_rows()))
+    db.session.commit()
+    return len(rows)
+
+
+def day_totals(shop_id, day) -> dict:
+    """
+    Shop day totals for daily report from ledgers
+    :param day: shop day, day_window().day for today
+    :return: dict with cash local expenses, cash by weight money
+        and by weight amounts by product
+    """
+    cash_row = DailyShopLedger.query.filter_by(
+        shop_id=shop_id, day=day, type_cost="cash"
+    ).first()
+    weights = DailyProductLedger.query.filter_by(shop_id=shop_id, day=day)
+    return {
+        "expense": (cash_row.local_expense or 0) if cash_row else 0,
+        "by_weight": (cash_row.by_weight or 0) if cash_row else 0,
+        "weights": {w.product_name: w.by_weight or 0 for w in weights},
+    }
+
+
+def actual_totals(shop_id, day) -> dict:
+    """Shop day totals as day_totals returns them, summed from transactions"""
+    window = day_window(day)
+    expense = (
+        db.session.query(func.coalesce(func.sum(Expense.money), 0))
+        .filter(
+            Expense.shop_id == shop_id,
+            Expense.type_cost == "cash",
+            Expense.is_global.isnot(True),
+            window.contains(Expense.timestamp),
+        )
+        .scalar()
+    )
+    weights = (
+        db.session.query(
+            ByWeight.product_name,
+            func.sum(case((ByWeight.type_cost == "cash", ByWeight.money), else_=0)),
+            func.sum(ByWeight.amount),
+        )
+        .join(Storage, ByWeight.storage_id == Storage.id)
+        .filter(Storage.shop_id == shop_id, window.contains(ByWeight.timestamp))
+        .group_by(ByWeight.product_name)
+        .all()
+    )
+    return {
+        "expense": expense or 0,
+        "by_weight": sum(money or 0 for _, money, _ in weights),
+        "weights": {name: amount or 0 for name, _, amount in weights},
+    }
+
+
+def check(day) -> list:
+    """
+    Compare ledger day totals of every shop with transactions
+    :param day: shop day
+    :return: list of (shop id, total, ledger value, transactions value)
+        that differ
+    """
+    drifts = []
+    for (shop_id,) in db.session.query(Shop.id).order_by(Shop.id).all():
+        recorded, actual = day_totals(shop_id, day), actual_totals(shop_id, day)
+        for total in ("expense", "by_weight"):
+            if recorded[total] != actual[total]:
+                drifts.append((shop_id, total, recorded[total], actual[total]))
+        for product in sorted(set(recorded["weights"]) | set(actual["weights"])):
+            values = (
+                recorded["weights"].get(product, 0),
+                actual["weights"].get(product, 0),
+            )
+            if abs(values[0] - values[1]) > 1e-6:
+                drifts.append((shop_id, product, *values))
+    return drifts
@@ -3,15 +3,27 @@ This module define Database Models
 """
 
 
-from datetime import date
-
 from flask_admin.babel import gettext
 from flask_security import RoleMixin, UserMixin
-from sqlalchemy import func
+from sqlalchemy import false, func, or_, true
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import joinedload
 from werkzeug.security import check_password_hash, generate_password_hash
 
-from app import date_today, db, login
+from app import db, login
+from app.today import day_window
+
+# products with own columns in Report and DailyShopLedger, a report counts
+# only them: other catalog products are kept in stock levels and can not
+# be sold by weight
+REPORT_PRODUCTS = (
+    "coffee_arabika",
+    "coffee_blend",
+    "milk",
+    "panini",
+    "sausages",
+    "buns",
+)
 
 
 @login.user_loader
@@ -40,6 +52,11 @@ class TimeMixin:
         db.DateTime(timezone=True), server_default=func.now(), index=True
     )
 
+    @classmethod
+    def in_days(cls, days):
+        """Filter of transactions made in any of shop days, a range per day"""
+        return or_(*[day_window(day).contains(cls.timestamp) for day in days])
+
 
 class MoneyMixin:
     """
@@ -93,7 +110,7 @@ class Shop(db.Model):
     baristas = db.relationship(
         "Barista",
         secondary=baristas,
-        lazy="subquery",
+        lazy=True,
         backref=db.backref("shop", lazy=True),
     )
     expenses = db.relationship(
@@ -108,6 +125,33 @@ class Shop(db.Model):
     deposit_funds = db.relationship(
         "DepositFund", backref="shop", lazy=True, cascade="all, delete-orphan"
     )
+    # transfers keep history of other shop, database unsets deleted shop
+    transfers_out = db.relationship(
+        "TransferProduct",
+        foreign_keys="TransferProduct.where_shop_id",
+        backref="where_shop",
+        lazy=True,
+        passive_deletes=True,
+    )
+    transfers_in = db.relationship(
+        "TransferProduct",
+        foreign_keys="TransferProduct.to_shop_id",
+        backref="to_shop",
+        lazy=True,
+        passive_deletes=True,
+    )
+    ledger = db.relationship(
+        "DailyShopLedger", backref="shop", lazy=True, cascade="all, delete-orphan"
+    )
+    product_ledger = db.relationship(
+        "DailyProductLedger", backref="shop", lazy=True, cascade="all, delete-orphan"
+    )
+    cash_entries = db.relationship(
+        "CashEntry", backref="shop", lazy=True, cascade="all, delete-orphan"
+    )
+    cash_checkpoints = db.relationship(
+        "CashCheckpoint", backref="shop", lazy=True, cascade="all, delete-orphan"
+    )
 
     def __repr__(self):
         return f"<Shop: {self.place_name}>"
@@ -173,12 +217,19 @@ class Storage(db.Model):
         cascade="all, delete-orphan",
         single_parent=True,
     )
-    coffee_arabika = db.Column(db.Float(50))
-    coffee_blend = db.Column(db.Float(50))
-    milk = db.Column(db.Float(50))
-    panini = db.Column(db.Integer)
-    sausages = db.Column(db.Integer)
-    buns = db.Column(db.Integer)
+    stock_levels = db.relationship(
+        "StockLevel",
+        backref="storage",
+        lazy=True,
+        cascade="all, delete-orphan",
+        order_by="StockLevel.product_id",
+    )
+    stock_movements = db.relationship(
+        "StockMovement", backref="storage", lazy=True, cascade="all, delete-orphan"
+    )
+    stock_snapshots = db.relationship(
+        "StockSnapshot", backref="storage", lazy=True, cascade="all, delete-orphan"
+    )
     supplies = db.relationship(
         "Supply", backref="storage", lazy=True, cascade="all, delete-orphan"
     )
@@ -199,6 +250,174 @@ class Storage(db.Model):
             return f"{self.shop.address}"
         return gettext(f"Склад: id-{self.id}")
 
+    @classmethod
+    def shop_storage_ids(cls, shop_id):
+        """Subquery of storage ids of shop"""
+        return db.select(cls.id).where(cls.shop_id == shop_id)
+
+    def stock_level(self, product_name):
+        """Stock level of product, None when missing"""
+        for level in self.stock_levels:
+            if level.product.name == product_name:
+                return level
+        return None
+
+    def quantity(self, product_name):
+        """Quantity of product in storage"""
+        level = self.stock_level(product_name)
+        return level.quantity if level else 0
+
+    def set_quantity(self, product_name, qty, reason=None):
+        """
+        Set quantity of product, create stock level when missing,
+        difference is journaled on flush with reason
+        """
+        level = self.stock_level(product_name)
+        if level is None:
+            product = Product.query.filter_by(name=product_name).one()
+            level = StockLevel(product=product)
+            self.stock_levels.append(level)
+        level.qty = qty
+        if reason:
+            level.reason = reason
+
+
+class Product(db.Model):
+    """
+    Model for product catalog
+    name: product code, used as product_name in transactions
+    is_piece: counted in pieces, else weighed
+    """
+
+    __tablename__ = "product"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), index=True, unique=True)
+    title = db.Column(db.String(64))
+    unit = db.Column(db.String(16))
+    is_piece = db.Column(db.Boolean, default=False)
+    stock_levels = db.relationship(
+        "StockLevel",
+        backref=db.backref("product", lazy="joined"),
+        lazy=True,
+        cascade="all, delete-orphan",
+    )
+
+    def __repr__(self):
+        return f"<Product: {self.name}>"
+
+    def __str__(self):
+        return gettext(self.title or self.name)
+
+
+ADJUSTMENT = "adjustment"
+
+
+class StockLevel(db.Model):
+    """Model for product quantity in storage"""
+
+    __tablename__ = "stock_level"
+    __table_args__ = (db.UniqueConstraint("storage_id", "product_id"),)
+    id = db.Column(db.Integer, primary_key=True)
+    storage_id = db.Column(db.Integer, db.ForeignKey("storage.id"), index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), index=True)
+    qty = db.Column(db.Float(50), default=0)
+    # journal hints, consumed by stock journal on flush
+    journaled = False
+    reason = ADJUSTMENT
+
+    def __repr__(self):
+        return f"<StockLevel: {self.storage_id} / {self.product_id}>"
+
+    def __str__(self):
+        return f"{self.product}: {self.quantity} {self.product.unit}"
+
+    @property
+    def quantity(self):
+        """Quantity, whole number for piece products"""
+        if self.qty is None:
+            return 0
+        return int(self.qty) if self.product.is_piece else self.qty
+
+    @classmethod
+    def add(cls, storage_id, product_name, delta, reason=ADJUSTMENT, timestamp=None):
+        """
+        Atomic change of product quantity in storage,
+        single keyed UPDATE, stock level created when missing,
+        movement written to stock journal
+        :param timestamp: movement time, database time by default
+        """
+        product_id = (
+            db.session.query(Product.id).filter_by(name=product_name).scalar_subquery()
+        )
+        updated = cls.query.filter(
+            cls.storage_id == storage_id, cls.product_id == product_id
+        ).update({cls.qty: cls.qty + delta}, synchronize_session="fetch")
+        StockMovement.record(storage_id, product_name, delta, reason, timestamp)
+        if not updated:
+            product = Product.query.filter_by(name=product_name).one()
+            level = cls(storage_id=storage_id, product=product, qty=delta)
+            level.journaled = True
+            db.session.add(level)
+            # next change of the product in transaction updates this row,
+            # also under no_autoflush
+            db.session.flush()
+
+
+class StockMovement(db.Model):
+    """
+    Model for append-only journal of storage product changes
+    reason: supply, write_off, by_weight, transfer, report, adjustment, initial
+    """
+
+    __tablename__ = "stock_movement"
+    __table_args__ = (
+        db.Index("ix_stock_movement_storage_time", "storage_id", "timestamp"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    storage_id = db.Column(db.Integer, db.ForeignKey("storage.id"))
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), index=True)
+    delta = db.Column(db.Float(50))
+    reason = db.Column(db.String(32))
+    timestamp = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    product = db.relationship("Product", lazy="joined")
+
+    def __repr__(self):
+        return f"<StockMovement: {self.storage_id} / {self.product_id} {self.delta}>"
+
+    @classmethod
+    def record(cls, storage_id, product_name, delta, reason, timestamp=None):
+        """
+        Append movement by product code, single INSERT ... SELECT
+        :param timestamp: movement time, database time by default
+        """
+        columns = ["storage_id", "product_id", "delta", "reason"]
+        values = [
+            db.literal(storage_id),
+            Product.id,
+            db.literal(float(delta)),
+            db.literal(reason),
+        ]
+        if timestamp is not None:
+            columns.append("timestamp")
+            values.append(db.literal(timestamp, cls.timestamp.type))
+        select_product = db.select(*values).where(Product.name == product_name)
+        db.session.execute(cls.__table__.insert().from_select(columns, select_product))
+
+
+class StockSnapshot(db.Model):
+    """Model for product quantity in storage at the end of a day"""
+
+    __tablename__ = "stock_snapshot"
+    __table_args__ = (db.UniqueConstraint("storage_id", "day", "product_id"),)
+    id = db.Column(db.Integer, primary_key=True)
+    storage_id = db.Column(db.Integer, db.ForeignKey("storage.id"))
+    product_id = db.Column(db.Integer, db.ForeignKey("product.id"), index=True)
+    day = db.Column(db.Date)
+    qty = db.Column(db.Float(50))
+
+    def __repr__(self):
+        return f"<StockSnapshot: {self.storage_id} / {self.day}>"
+
 
 roles = db.Table(
     "roles",
@@ -257,13 +476,24 @@ class Barista(db.Model, UserMixin):
         """Check right role, is moderator"""
         return self.has_role("moderator")
 
-    @hybrid_property
+    @property
     def storage(self):
-        """Return storage list, please work"""
-        shop_ids = [shop.id for shop in self.shop]
-        storage_query = Storage.query.filter_by
-        storage_list = [storage_query(shop_id=id).first() for id in shop_ids]
-        return storage_list
+        """Return storage list of work places"""
+        return Storage.query.filter(
+            Storage.id.in_(self.work_storage_ids(self.id))
+        ).all()
+
+    @classmethod
+    def work_shop_ids(cls, barista_id):
+        """Subquery of barista work place ids"""
+        return db.select(baristas.c.shop_id).where(baristas.c.barista_id == barista_id)
+
+    @classmethod
+    def work_storage_ids(cls, barista_id):
+        """Subquery of storage ids of barista work places"""
+        return db.select(Storage.id).where(
+            Storage.shop_id.in_(cls.work_shop_ids(barista_id))
+        )
 
     def check_password(self, password):
         """Password validation"""
@@ -332,7 +562,7 @@ class Report(TimeMixin, db.Model):
     expenses = db.relationship(
         "Expense",
         secondary=expenses,
-        lazy="subquery",
+        lazy=True,
         backref=db.backref("reports", lazy=True),
         cascade="all, delete-orphan",
         single_parent=True,
@@ -396,6 +626,9 @@ class Expense(TimeMixin, MoneyMixin, db.Model):
     """Model for expense transaction"""
 
     __tablename__ = "expense"
+    __table_args__ = (
+        db.Index("ix_expense_shop_global_time", "shop_id", "is_global", "timestamp"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     barista_id = db.Column(db.Integer, db.ForeignKey("barista.id"))
     shop_id = db.Column(db.Integer, db.ForeignKey("shop.id"))
@@ -404,7 +637,7 @@ class Expense(TimeMixin, MoneyMixin, db.Model):
     categories = db.relationship(
         "Category",
         secondary=categories,
-        lazy="subquery",
+        lazy=True,
         backref=db.backref("expense", lazy=True),
     )
 
@@ -418,28 +651,38 @@ class Expense(TimeMixin, MoneyMixin, db.Model):
             )
         return f"{self.money} грн.(Безнал) / {self.shop.address} / {self.timestamp:%d.%m.%y}г."
 
+    @hybrid_property
+    def is_local(self):
+        """Expense of shop day, not global"""
+        return not self.is_global
+
+    @is_local.expression
+    def is_local(cls):
+        """SQL predicate of local expense, matches ix_expense_shop_global_time"""
+        return cls.is_global == false()
+
     @classmethod
     def get_global(cls, shop_id, today=False):
         """Get global expense by shop id"""
-        _query = cls.query.filter_by(shop_id=shop_id).filter(cls.is_global)
+        _query = cls.query.filter_by(shop_id=shop_id).filter(cls.is_global == true())
         if today:
-            _query = _query.filter(cls.timestamp >= date_today)
+            _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
     @classmethod
     def get_local(cls, shop_id, today=False):
         """Get local expense by shop id"""
-        _query = cls.query.filter_by(shop_id=shop_id).filter(not cls.is_global)
+        _query = cls.query.filter_by(shop_id=shop_id).filter(cls.is_local)
         if today:
-            _query = _query.filter(cls.timestamp >= date_today)
+            _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
     @classmethod
     def by_timestamp(cls, shop_id, timestamp):
         """Get local expense by shop id and timestamp"""
         del timestamp
-        _query = cls.query.filter_by(shop_id=shop_id).filter(not cls.is_global)
-        _query = _query.filter(func.date(cls.timestamp) == date.today()).all()
+        _query = cls.query.filter_by(shop_id=shop_id).filter(cls.is_local)
+        _query = _query.filter(day_window().contains(cls.timestamp)).all()
         return _query
 
 
@@ -457,7 +700,7 @@ class DepositFund(TimeMixin, MoneyMixin, db.Model):
         """Get local deposit funds by shop id"""
         _query = cls.query.filter_by(shop_id=shop_id)
         if today:
-            _query = _query.filter(cls.timestamp >= date_today)
+            _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
 
@@ -475,7 +718,7 @@ class CollectionFund(TimeMixin, MoneyMixin, db.Model):
         """Get local collection funds by shop id"""
         _query = cls.query.filter_by(shop_id=shop_id)
         if today:
-            _query = _query.filter(cls.timestamp >= date_today)
+            _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
 
@@ -483,6 +726,9 @@ class Supply(TimeMixin, MoneyMixin, ProductMixin, db.Model):
     """Model for supply transaction"""
 
     __tablename__ = "supply"
+    __table_args__ = (
+        db.Index("ix_supply_storage_time", "storage_id", "timestamp"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     barista_id = db.Column(db.Integer, db.ForeignKey("barista.id"))
     storage_id = db.Column(db.Integer, db.ForeignKey("storage.id"))
@@ -502,16 +748,16 @@ class Supply(TimeMixin, MoneyMixin, ProductMixin, db.Model):
         """Get supply by storage id"""
         _query = cls.query.filter_by(storage_id=storage_id)
         if today:
-            _query = _query.filter(cls.timestamp >= date_today)
+            _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
     @classmethod
     def get_local_by_shop(cls, shop_id):
         """Get supply by shop id"""
-        storage = Storage.query.filter_by(shop_id=shop_id).first_or_404()
-        _query = cls.query.filter_by(storage_id=storage.id).filter(
-            cls.timestamp >= date_today
+        _query = cls.query.filter(
+            cls.storage_id.in_(Storage.shop_storage_ids(shop_id))
         )
+        _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
 
@@ -519,6 +765,9 @@ class ByWeight(TimeMixin, MoneyMixin, ProductMixin, db.Model):
     """Model for by weight transaction"""
 
     __tablename__ = "by_weight"
+    __table_args__ = (
+        db.Index("ix_by_weight_storage_time", "storage_id", "timestamp"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     barista_id = db.Column(db.Integer, db.ForeignKey("barista.id"))
     storage_id = db.Column(db.Integer, db.ForeignKey("storage.id"))
@@ -538,16 +787,16 @@ class ByWeight(TimeMixin, MoneyMixin, ProductMixin, db.Model):
         """Get by weight transaction by storage id"""
         _query = cls.query.filter_by(storage_id=storage_id)
         if today:
-            _query = _query.filter(cls.timestamp >= date_today)
+            _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
     @classmethod
     def get_local_by_shop(cls, shop_id):
         """Get by weight transaction by shop id"""
-        storage = Storage.query.filter_by(shop_id=shop_id).first_or_404()
-        _query = cls.query.filter_by(storage_id=storage.id).filter(
-            cls.timestamp >= date_today
+        _query = cls.query.filter(
+            cls.storage_id.in_(Storage.shop_storage_ids(shop_id))
         )
+        _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
 
@@ -555,6 +804,9 @@ class WriteOff(TimeMixin, ProductMixin, db.Model):
     """Model for write off transaction"""
 
     __tablename__ = "write_off"
+    __table_args__ = (
+        db.Index("ix_write_off_storage_time", "storage_id", "timestamp"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     barista_id = db.Column(db.Integer, db.ForeignKey("barista.id"))
     storage_id = db.Column(db.Integer, db.ForeignKey("storage.id"))
@@ -570,10 +822,10 @@ class WriteOff(TimeMixin, ProductMixin, db.Model):
     @classmethod
     def get_local_by_shop(cls, shop_id):
         """Get write off by shop id"""
-        storage = Storage.query.filter_by(shop_id=shop_id).first_or_404()
-        _query = cls.query.filter_by(storage_id=storage.id).filter(
-            cls.timestamp >= date_today
+        _query = cls.query.filter(
+            cls.storage_id.in_(Storage.shop_storage_ids(shop_id))
         )
+        _query = _query.filter(day_window().contains(cls.timestamp))
         return _query
 
 
@@ -581,16 +833,149 @@ class TransferProduct(TimeMixin, ProductMixin, db.Model):
     """Model for transfer products"""
 
     __tablename__ = "transfer_product"
+    __table_args__ = (
+        db.Index("ix_transfer_product_where_shop_time", "where_shop_id", "timestamp"),
+        db.Index("ix_transfer_product_to_shop_time", "to_shop_id", "timestamp"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     barista_id = db.Column(db.Integer, db.ForeignKey("barista.id"))
-    where_shop = db.Column(db.String(64), index=True)
-    to_shop = db.Column(db.String(64), index=True)
+    where_shop_id = db.Column(
+        db.Integer, db.ForeignKey("shop.id", ondelete="SET NULL")
+    )
+    to_shop_id = db.Column(db.Integer, db.ForeignKey("shop.id", ondelete="SET NULL"))
     backdating = db.Column(db.Boolean, default=False)
 
+    def counterpart(self, shop_id):
+        """Other shop of transfer for shop"""
+        return self.to_shop if self.where_shop_id == shop_id else self.where_shop
+
     @classmethod
-    def get_shop(cls, shop_id, today=True):
-        """Get transfer products by shop id"""
-        _query = Shop.query.filter_by(id=shop_id)
-        if today:
-            _query = _query.filter(cls.timestamp >= date_today)
-        return _query
+    def of_shops(cls, shop_ids):
+        """Get transfers from or to shops, both shops loaded"""
+        _query = cls.query.options(joinedload(cls.where_shop), joinedload(cls.to_shop))
+        return _query.filter(
+            or_(cls.where_shop_id.in_(shop_ids), cls.to_shop_id.in_(shop_ids))
+        )
+
+    @classmethod
+    def get_on_day(cls, shop_ids, window=None):
+        """Get transfers of shops in day window, today by default"""
+        window = window or day_window()
+        _query = cls.of_shops(shop_ids).filter(window.contains(cls.timestamp))
+        return _query.order_by(cls.timestamp)
+
+
+class DailyShopLedger(db.Model):
+    """
+    Daily rollup of shop transactions by type cost,
+    money by transaction kind and product deltas.
+    Kept up to date by app.ledger, rebuilt by 'flask ledger rebuild'
+    """
+
+    __tablename__ = "daily_shop_ledger"
+    __table_args__ = (db.UniqueConstraint("shop_id", "day", "type_cost"),)
+    id = db.Column(db.Integer, primary_key=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey("shop.id"), index=True)
+    day = db.Column(db.Date, index=True)
+    # 'cash', 'cashless' or 'stock' for movements without money
+    type_cost = db.Column(db.String(64))
+    expense = db.Column(db.Integer, default=0)
+    # expenses without global ones, report counts only them
+    local_expense = db.Column(db.Integer, default=0)
+    supply = db.Column(db.Integer, default=0)
+    by_weight = db.Column(db.Integer, default=0)
+    deposit_fund = db.Column(db.Integer, default=0)
+    collection_fund = db.Column(db.Integer, default=0)
+    # stock deltas of REPORT_PRODUCTS
+    coffee_arabika = db.Column(db.Float(50), default=0.0)
+    coffee_blend = db.Column(db.Float(50), default=0.0)
+    milk = db.Column(db.Float(50), default=0.0)
+    panini = db.Column(db.Float(50), default=0.0)
+    sausages = db.Column(db.Float(50), default=0.0)
+    buns = db.Column(db.Float(50), default=0.0)
+
+    def __repr__(self):
+        return f"<DailyShopLedger: {self.shop_id} {self.day} {self.type_cost}>"
+
+    @hybrid_property
+    def money_in(self):
+        """Money came to shop"""
+        return self.by_weight + self.deposit_fund
+
+    @hybrid_property
+    def money_out(self):
+        """Money left shop"""
+        return self.expense + self.supply + self.collection_fund
+
+
+class DailyProductLedger(db.Model):
+    """
+    Daily rollup of shop by weight amounts by product.
+    Kept up to date by app.ledger, rebuilt by 'flask ledger rebuild'
+    """
+
+    __tablename__ = "daily_product_ledger"
+    __table_args__ = (db.UniqueConstraint("shop_id", "day", "product_name"),)
+    id = db.Column(db.Integer, primary_key=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey("shop.id"), index=True)
+    day = db.Column(db.Date, index=True)
+    product_name = db.Column(db.String(80))
+    by_weight = db.Column(db.Float(50), default=0.0)
+
+    def __repr__(self):
+        return f"<DailyProductLedger: {self.shop_id} {self.day} {self.product_name}>"
+
+
+class CashEntry(db.Model):
+    """
+    Model for double-entry cash ledger of shop,
+    amount moves from credit account to debit account
+    shop accounts: 'cash', 'cashless'
+    counter accounts: expense, supply, by_weight, deposit_fund, collection_fund,
+    report, opening, adjustment
+    """
+
+    __tablename__ = "cash_entry"
+    __table_args__ = (db.Index("ix_cash_entry_shop_time", "shop_id", "timestamp"),)
+    id = db.Column(db.Integer, primary_key=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey("shop.id"))
+    debit = db.Column(db.String(32))
+    credit = db.Column(db.String(32))
+    amount = db.Column(db.Integer)
+    timestamp = db.Column(db.DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<CashEntry: {self.debit} <- {self.credit} {self.amount}>"
+
+    @classmethod
+    def post(cls, shop, account, counter, amount, timestamp=None):
+        """
+        Add entry moving amount into shop account from counter account,
+        negative amount moves it out
+        :param timestamp: entry time, database time by default
+        """
+        if not amount:
+            return None
+        if amount > 0:
+            entry = cls(shop=shop, debit=account, credit=counter, amount=amount)
+        else:
+            entry = cls(shop=shop, debit=counter, credit=account, amount=-amount)
+        if timestamp is not None:
+            entry.timestamp = timestamp
+        db.session.add(entry)
+        return entry
+
+
+class CashCheckpoint(db.Model):
+    """Model for shop cash and cashless balance at the end of a day"""
+
+    __tablename__ = "cash_checkpoint"
+    __table_args__ = (db.UniqueConstraint("shop_id", "day"),)
+    id = db.Column(db.Integer, primary_key=True)
+    shop_id = db.Column(db.Integer, db.ForeignKey("shop.id"))
+    day = db.Column(db.Date)
+    cash = db.Column(db.Integer)
+    cashless = db.Column(db.Integer)
+
+    def __repr__(self):
+        return f"<CashCheckpoint: {self.shop_id} / {self.day}>"
@@ -0,0 +1,74 @@
+"""
+Module contains keyset pagination of transaction models on (timestamp, id),
+newest first, pages are addressed by cursor of the boundary row
+"""
+
+
+from datetime import datetime
+
+from sqlalchemy import text, tuple_
+
+
+def cursor(record) -> str:
+    """Cursor of record: timestamp and id"""
+    return f"{record.timestamp.isoformat()},{record.id}"
+
+
+def parse_cursor(value):
+    """
+    Timestamp and id from cursor
+    :return: (timestamp, id) or None for empty or invalid cursor
+    """
+    if not value:
+        return None
+    timestamp, _sep, record_id = value.rpartition(",")
+    try:
+        return datetime.fromisoformat(timestamp), int(record_id)
+    except ValueError:
+        return None
+
+
+def seek(query, model, after=None, before=None):
+    """
+    Order query newest first and move it past cursor
+    :param after: cursor, rows older than it
+    :param before: cursor, rows newer than it, ordered oldest first
+    """
+    key = tuple_(model.timestamp, model.id)
+    _query = query.limit(None).offset(None).order_by(None)
+    after, before = parse_cursor(after), parse_cursor(before)
+    if before:
+        _query = _query.filter(key > tuple_(*before))
+        return _query.order_by(model.timestamp, model.id)
+    if after:
+        _query = _query.filter(key < tuple_(*after))
+    return _query.order_by(model.timestamp.desc(), model.id.desc())
+
+
+def estimated_count(query, model):
+    """
+    Row count estimate of model table from PostgreSQL statistics,
+    None on other databases
+    """
+    if query.session.get_bind().dialect.name != "postgresql":
+        return None
+    _query = text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name")
+    count = query.session.execute(_query, {"name": model.__tablename__}).scalar()
+    return max(count or 0, 0)
+
+
+class KeysetPage:
+    """Page of rows with cursors of neighbour pages"""
+
+    def __init__(self, query, model, per_page, after=None, before=None):
+        rows = seek(query, model, after, before).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        self.items = rows[:per_page]
+        if before and parse_cursor(before):
+            self.items.reverse()
+            self.has_prev, self.has_next = has_more, True
+        else:
+            self.has_prev = bool(parse_cursor(after))
+            self.has_next = has_more
+        self.prev_cursor = cursor(self.items[0]) if self.items else None
+        self.next_cursor = cursor(self.items[-1]) if self.items else None
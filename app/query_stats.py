@@ -0,0 +1,124 @@
+"""
+Module collects SQL statements stats of a request:
+count, total time, slowest statements, counts inside named scopes
+"""
+
+
+import heapq
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app
+
+
+def request_stats():
+    """Query stats of current request, None outside app context"""
+    if not has_app_context():
+        return None
+    if "query_stats" not in g:
+        g.query_stats = {
+            "count": 0,
+            "time": 0.0,
+            "slowest": [],
+            "scopes": defaultdict(int),
+            "active": [],
+        }
+    return g.query_stats
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query(conn, cursor, statement, parameters, context, executemany):
+    """Remember statement start time"""
+    del cursor, parameters, context, executemany
+    conn.info.setdefault("query_start", []).append((statement, perf_counter()))
+
+
+@event.listens_for(Engine, "handle_error")
+def drop_query_start(context):
+    """Forget start time of failed statement, after_cursor_execute won't come"""
+    conn = context.connection
+    stack = conn.info.get("query_start") if conn is not None else None
+    if stack and stack[-1][0] == context.statement:
+        stack.pop()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def end_query(conn, cursor, statement, parameters, context, executemany):
+    """Count statement in request and active scopes, keep slowest"""
+    del cursor, parameters, context, executemany
+    elapsed = perf_counter() - conn.info["query_start"].pop()[1]
+    threshold = app.config["SLOW_QUERY_THRESHOLD"]
+    if threshold is not None and elapsed >= threshold:
+        app.logger.warning(
+            "Slow query %.3fs on %s: %s",
+            elapsed,
+            request.endpoint if has_request_context() else "-",
+            statement,
+        )
+    stats = request_stats()
+    if stats is None:
+        return
+    stats["count"] += 1
+    stats["time"] += elapsed
+    for scope in set(stats["active"]):
+        stats["scopes"][scope] += 1
+    slowest = stats["slowest"]
+    item = (elapsed, stats["count"], statement)
+    if len(slowest) < app.config["SLOWEST_QUERIES_LOGGED"]:
+        heapq.heappush(slowest, item)
+    elif slowest and item > slowest[0]:
+        heapq.heapreplace(slowest, item)
+
+
+@contextmanager
+def query_scope(name):
+    """Count statements issued inside block under scope name"""
+    stats = request_stats()
+    if stats is None:
+        yield
+        return
+    stats["active"].append(name)
+    try:
+        yield
+    finally:
+        stats["active"].pop()
+
+
+@app.after_request
+def log_query_stats(response):
+    """Log statements stats of request, add Server-Timing header"""
+    stats = g.get("query_stats")
+    if not stats:
+        return response
+    threshold = app.config["SLOW_QUERY_THRESHOLD"]
+    slow_request = threshold is not None and stats["time"] >= threshold
+    # every request at DEBUG, only slow ones reach production logs
+    app.logger.log(
+        logging.WARNING if slow_request else logging.DEBUG,
+        "%s %s: %s queries in %.1fms%s",
+        request.method,
+        request.endpoint,
+        stats["count"],
+        stats["time"] * 1000,
+        "".join(f", {k} {v}" for k, v in stats["scopes"].items()),
+    )
+    for elapsed, number, statement in sorted(stats["slowest"], reverse=True):
+        app.logger.log(
+            logging.INFO if slow_request else logging.DEBUG,
+            "  #%s %.1fms %s",
+            number,
+            elapsed * 1000,
+            statement,
+        )
+    if app.config["SERVER_TIMING_HEADER"]:
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats["time"] * 1000:.1f};desc="{stats["count"]} queries"',
+        )
+    return response
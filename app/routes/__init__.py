@@ -6,13 +6,20 @@ Init route package
 from flask import g
 from flask_babelex import get_locale
 from flask_babelex import lazy_gettext as _l
+from flask_modals import render_template_modal
+from flask_security import current_user
+from sqlalchemy.orm import joinedload, selectinload
+from werkzeug.local import LocalProxy
 
 from app import app
+from app.access import access_context
 from app.business_logic import is_report_send as is_send
+from app.business_logic import load_day_transactions
 from app.forms import (ByWeightForm, ExpanseForm, SupplyForm, TransferForm,
                        WriteOffForm)
-from app.models import (ByWeight, CollectionFund, DepositFund, Expense, Shop,
-                        Supply, TransferProduct, WriteOff)
+from app.models import Shop, Storage
+from app.query_stats import query_scope
+from app.today import local_day
 
 
 @app.before_request
@@ -38,41 +45,86 @@ def translate_filter(word):
     return dict_translate.get(word, default).title()
 
 
+@app.template_filter("shop_day")
+def shop_day_filter(timestamp):
+    """Jinja filter, shop day of timestamp"""
+    return local_day(timestamp)
+
+
+def lazy_context(factory):
+    """
+    Proxy of context value, factory called on first use in template,
+    queries it runs counted under "context" scope
+    """
+    value = []
+
+    def load():
+        if not value:
+            with query_scope("context"):
+                value.append(factory())
+        return value[0]
+
+    return LocalProxy(load)
+
+
+def load_coffee_shops(barista):
+    """Shops of barista work places with storage, equipment and baristas"""
+    return (
+        Shop.get_barista_work(barista)
+        .options(
+            joinedload(Shop.storage).selectinload(Storage.stock_levels),
+            joinedload(Shop.shop_equipment),
+            selectinload(Shop.baristas),
+        )
+        .all()
+    )
+
+
 @app.context_processor
 def inject_form():
     """
-    Injection forms instance in context view
+    Injection forms instance in context view,
+    forms created only when template uses them
     :return: dict from predict forms
     """
-    expense_form = ExpanseForm()
-    by_weight_form = ByWeightForm()
-    write_off_form = WriteOffForm()
-    supply_form = SupplyForm()
-    transfer_form = TransferForm()
     return dict(
-        expense_form=expense_form,
-        by_weight_form=by_weight_form,
-        write_off_form=write_off_form,
-        supply_form=supply_form,
-        transfer_form=transfer_form,
+        expense_form=lazy_context(ExpanseForm),
+        by_weight_form=lazy_context(ByWeightForm),
+        write_off_form=lazy_context(WriteOffForm),
+        supply_form=lazy_context(SupplyForm),
+        transfer_form=lazy_context(TransferForm),
     )
 
 
+@app.context_processor
+def inject_access():
+    """
+    Inject authorization context of current user,
+    loaded when template checks roles or work places
+    :return: dict with access context
+    """
+    return dict(access=lazy_context(access_context))
+
+
 @app.context_processor
 def inject_models():
     """
     Inject db models in context view
     :return: dict from predict models
     """
-    coffee_shop_list = Shop.query.all()
-    return dict(
-        coffee_shop_list=coffee_shop_list,
-        supply=Supply,
-        by_weight=ByWeight,
-        write_off=WriteOff,
-        expense=Expense,
-        deposit_fund=DepositFund,
-        collection_fund=CollectionFund,
-        transfer=TransferProduct,
-        is_report_send=is_send,
+    return dict(is_report_send=is_send)
+
+
+def render_home():
+    """
+    Render main page with today's transactions
+    of the shops visible to current user and transaction modals
+    """
+    shops = load_coffee_shops(current_user)
+    return render_template_modal(
+        "index.html",
+        modal="modal-form",
+        coffee_shop_list=shops,
+        day_transactions=load_day_transactions(shops),
+        transaction_modals=True,
     )
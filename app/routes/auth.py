@@ -6,13 +6,14 @@ from datetime import datetime
 
 from flask import flash, redirect, render_template, url_for
 from flask_babelex import _
-from flask_modals import render_template_modal
 from flask_security import (login_required, login_user, logout_user,
                             roles_accepted)
 
 from app import app, db
+from app.cache import reference_cache
 from app.forms import LoginForm, RegistrationForm
 from app.models import Barista, Role, Shop
+from app.routes import render_home
 
 
 @app.route("/")
@@ -20,7 +21,7 @@ from app.models import Barista, Role, Shop
 @login_required
 def home():
     """Main page"""
-    return render_template_modal("index.html", modal="modal-form")
+    return render_home()
 
 
 @app.route("/login", methods=("GET", "POST"))
@@ -61,6 +62,7 @@ def create_new_staff():
 
         db.session.add(user)
         db.session.commit()
+        reference_cache.clear()
         flash(_("Вы добавили нового ссотрудника!"))
         return redirect(url_for("home"))
     return render_template("auth/new_staff.html", form=form)
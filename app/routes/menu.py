@@ -4,16 +4,19 @@ Module for transaction menu
 
 from datetime import datetime
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import (Blueprint, flash, jsonify, redirect, render_template,
+                   request, url_for)
 from flask_babelex import _
-from flask_modals import render_template_modal
 from flask_security import login_required, roles_accepted
 
 from app import db
-from app.business_logic import TransactionHandler
+from app.batch import BatchError, import_batch, read_records
+from app.business_logic import ReportSentError, TransactionHandler
+from app.cache import reference_cache
 from app.forms import (ByWeightForm, CoffeeShopForm, ExpanseForm, SupplyForm,
-                       WriteOffForm)
+                       TransferForm, WriteOffForm)
 from app.models import Barista, Shop, ShopEquipment, Storage
+from app.routes import render_home
 
 menu = Blueprint("menu", __name__, url_prefix="/menu")
 
@@ -32,7 +35,7 @@ def expense():
             flash(_("Транзакция принята!"))
         return redirect(url_for("home"))
     flash(_("Транзакция не принята!  Попробуйте заново, с коректными значениями."))
-    return render_template_modal("index.html", modal="modal-form")
+    return render_home()
 
 
 @menu.route(
@@ -54,7 +57,7 @@ def by_weight():
             flash(_("Транзакция принята!"))
         return redirect(url_for("home"))
     flash(_("Транзакция не принята!  Попробуйте заново, с коректными значениями."))
-    return render_template_modal("index.html", modal="modal-form")
+    return render_home()
 
 
 @menu.route("/write_off", methods=("POST",))
@@ -71,7 +74,7 @@ def write_off():
             flash(_("Транзакция принята!"))
         return redirect(url_for("home"))
     flash(_("Транзакция не принята!  Попробуйте заново, с коректными значениями."))
-    return render_template_modal("index.html", modal="modal-form")
+    return render_home()
 
 
 @menu.route("/supply", methods=("POST",))
@@ -88,7 +91,39 @@ def supply():
             flash(_("Транзакция принята!"))
         return redirect(url_for("home"))
     flash(_("Транзакция не принята!  Попробуйте заново, с коректными значениями."))
-    return render_template_modal("index.html", modal="modal-form")
+    return render_home()
+
+
+@menu.route("/transfer", methods=("POST",))
+@login_required
+def transfer():
+    """Transfer products to other shop form"""
+    form = TransferForm(request.form)
+    transaction = TransactionHandler(form.where_choice.data)
+    if form.validate_on_submit():
+        try:
+            transaction.create_transfer(form)
+        except ReportSentError:
+            db.session.rollback()
+            flash(_("Сегодняшний отчет уже был отправлен!"))
+        else:
+            flash(_("Транзакция принята!"))
+        return redirect(url_for("home"))
+    flash(_("Транзакция не принята!  Попробуйте заново, с коректными значениями."))
+    return render_home()
+
+
+@menu.route("/batch", methods=("POST",))
+@login_required
+def batch():
+    """Batch of offline transactions, json list or csv"""
+    content_type = request.content_type or ""
+    data = request.get_json() if request.is_json else request.get_data()
+    try:
+        created = import_batch(read_records(data, content_type))
+    except BatchError as error:
+        return jsonify(errors=error.errors), 400
+    return jsonify(created=created)
 
 
 @menu.route("/create_coffee_shop", methods=("GET", "POST"))
@@ -127,6 +162,7 @@ def create_coffee_shop():
         db.session.add(equipment)
         db.session.add(shop)
         db.session.commit()
+        reference_cache.clear()
         flash(_("Создана новая кофейня!"))
         return redirect(url_for("home"))
     return render_template("menu/new_coffee_shop.html", form=form)
@@ -2,16 +2,24 @@
 Module for report form
 """
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from collections import defaultdict
+
+from flask import (Blueprint, abort, flash, jsonify, redirect, render_template,
+                   request, url_for)
 from flask_babelex import _
-from flask_security import current_user, login_required
+from flask_security import login_required
+from sqlalchemy import true, tuple_
+from sqlalchemy.orm import joinedload, selectinload
 
-from app import app, date_today
+from app import app, ledger
+from app.access import access_context
 from app.business_logic import TransactionHandler
 from app.forms import ReportForm
 from app.models import (ByWeight, Category, CollectionFund, DepositFund,
                         Expense, Report, Shop, Storage, Supply,
                         TransferProduct)
+from app.pagination import KeysetPage, seek
+from app.today import day_window, local_day
 
 report = Blueprint("reports", __name__, url_prefix="/report")
 
@@ -23,7 +31,9 @@ def create():
     form = ReportForm(request.form)
     find_salary_exp = Expense.query.select_from(Category)
     find_salary_exp = find_salary_exp.filter(Category.name == "Зарплата")
-    find_salary_exp = find_salary_exp.filter(Expense.timestamp >= date_today).first()
+    find_salary_exp = find_salary_exp.filter(
+        day_window().contains(Expense.timestamp)
+    ).first()
     if not find_salary_exp:
         flash(_("Возьмите зарплату за сегодняшний день!"))
     if form.validate_on_submit():
@@ -40,32 +50,100 @@ def create():
     )
 
 
+@report.route("/preview/<int:shop_id>")
+@login_required
+def preview(shop_id):
+    """Day totals of shop for report form from ledgers"""
+    access = access_context()
+    if not (access.is_admin or shop_id in access.shop_ids):
+        abort(404)
+    shop = Shop.query.get_or_404(shop_id)
+    totals = ledger.day_totals(shop_id, day_window().day)
+    return jsonify(
+        expense=totals["expense"],
+        by_weight=totals["by_weight"],
+        weights=totals["weights"],
+        expected_balance=shop.cash + totals["expense"] - totals["by_weight"],
+    )
+
+
+def by_report_day(query, days) -> dict:
+    """Transactions of query made in report days, grouped by day"""
+    grouped = defaultdict(list)
+    if not days:
+        return grouped
+    model = query.column_descriptions[0]["entity"]
+    _query = query.filter(model.in_days(days)).order_by(model.timestamp)
+    for record in _query:
+        grouped[local_day(record.timestamp)].append(record)
+    return grouped
+
+
 @report.route("/<shop_address>")
 @login_required
 def on_address(shop_address):
     """Render all reports with pagination"""
     shop = Shop.query.filter_by(address=shop_address).first_or_404()
     storage = Storage.query.filter_by(shop_id=shop.id).first_or_404()
-    reports = Report.query.filter_by(shop_id=shop.id).order_by(Report.timestamp.desc())
-    if not (current_user.has_role("admin") or current_user.has_role("moderator")):
-        reports = reports.limit(app.config["REPORTS_USER_VIEW"]).from_self()
+    reports = Report.query.filter_by(shop_id=shop.id)
+    if not access_context().is_staff:
+        # only latest reports, bounded by key of the last visible one
+        oldest = (
+            seek(reports, Report)
+            .offset(app.config["REPORTS_USER_VIEW"] - 1)
+            .with_entities(Report.timestamp, Report.id)
+            .first()
+        )
+        if oldest:
+            reports = reports.filter(
+                tuple_(Report.timestamp, Report.id) >= tuple_(*oldest)
+            )
 
-    global_expense = Expense.get_global(shop.id)
-    local_expense = Expense.get_local(shop.id)
-    supply = Supply.get_local(storage.id, False)
-    by_weight = ByWeight.get_local(storage.id, False)
-    deposit_fund = DepositFund.get_local_by_shop(shop.id, False)
-    collection_fund = CollectionFund.get_local_by_shop(shop.id, False)
-    transfer = TransferProduct
-    page = request.args.get("page", 1, type=int)
-    reports = reports.paginate(page, app.config["REPORTS_PER_PAGE"], False)
+    reports = KeysetPage(
+        reports,
+        Report,
+        app.config["REPORTS_PER_PAGE"],
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+    )
+    days = {local_day(r.timestamp) for r in reports.items}
+    expenses = Expense.query.filter_by(shop_id=shop.id).options(
+        selectinload(Expense.categories)
+    )
+    global_expense = by_report_day(expenses.filter(Expense.is_global == true()), days)
+    local_expense = by_report_day(expenses.filter(Expense.is_local), days)
+    supply = by_report_day(Supply.query.filter_by(storage_id=storage.id), days)
+    by_weight = by_report_day(ByWeight.query.filter_by(storage_id=storage.id), days)
+    deposit_fund = by_report_day(
+        DepositFund.query.filter_by(shop_id=shop.id).options(
+            joinedload(DepositFund.barista)
+        ),
+        days,
+    )
+    collection_fund = by_report_day(
+        CollectionFund.query.filter_by(shop_id=shop.id).options(
+            joinedload(CollectionFund.barista)
+        ),
+        days,
+    )
+    # pairs of (transfer, counterpart shop), both shops joined by of_shops
+    transfer = {
+        day: [(t, t.counterpart(shop.id)) for t in transfers]
+        for day, transfers in by_report_day(
+            TransferProduct.of_shops([shop.id]), days
+        ).items()
+    }
     next_url = (
-        url_for("reports.on_address", shop_address=shop.address, page=reports.next_num)
+        url_for(
+            "reports.on_address", shop_address=shop.address, after=reports.next_cursor
+        )
         if reports.has_next
         else None
     )
     prev_url = (
-        url_for("reports.on_address", shop_address=shop.address, page=reports.prev_num)
+        url_for(
+            "reports.on_address", shop_address=shop.address, before=reports.prev_cursor
+        )
         if reports.has_prev
         else None
     )
@@ -0,0 +1,130 @@
+"""
+Module keeps append-only stock movement journal,
+end of day snapshots and point-in-time stock queries
+"""
+
+
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect
+
+from app import db
+from app.models import (ADJUSTMENT, StockLevel, StockMovement, StockSnapshot,
+                        Storage)
+from app.today import database_now, day_window, db_timestamp, local_day
+
+
+@event.listens_for(db.session, "before_flush")
+def journal_stock_levels(session, flush_context, instances):
+    """Journal stock level quantities set through ORM"""
+    del flush_context, instances
+    for record in session.dirty:
+        if isinstance(record, StockMovement) and session.is_modified(record):
+            raise ValueError("Stock movements are append-only")
+
+    def movement(level, delta):
+        journaled = vars(level).pop("journaled", False)
+        reason = vars(level).pop("reason", ADJUSTMENT)
+        if not delta or journaled:
+            return
+        session.add(
+            StockMovement(
+                storage=level.storage, product=level.product, delta=delta, reason=reason
+            )
+        )
+
+    for record in session.new:
+        if isinstance(record, StockLevel):
+            movement(record, record.qty or 0)
+    for record in session.dirty:
+        if isinstance(record, StockLevel) and session.is_modified(record):
+            history = inspect(record).attrs.qty.history
+            if history.deleted and history.added:
+                movement(record, (history.added[0] or 0) - (history.deleted[0] or 0))
+    for record in session.deleted:
+        if isinstance(record, StockLevel) and record.storage not in session.deleted:
+            movement(record, -(record.qty or 0))
+
+
+def day_end(day) -> datetime:
+    """Start of the next shop day, snapshot of day covers movements before it"""
+    return day_window(day).end
+
+
+def stock_at(storage_id, moment) -> dict:
+    """
+    Stock of storage at moment from latest snapshot before it
+    plus movements after the snapshot
+    :return: dict product_id -> quantity
+    """
+    snapshot_day = (
+        db.session.query(func.max(StockSnapshot.day))
+        .filter(
+            StockSnapshot.storage_id == storage_id,
+            StockSnapshot.day < local_day(moment),
+        )
+        .scalar()
+    )
+    stock = defaultdict(float)
+    movements = db.session.query(
+        StockMovement.product_id, func.sum(StockMovement.delta)
+    ).filter(
+        StockMovement.storage_id == storage_id,
+        StockMovement.timestamp < db_timestamp(moment),
+    )
+    if snapshot_day is not None:
+        snapshots = StockSnapshot.query.filter_by(
+            storage_id=storage_id, day=snapshot_day
+        )
+        for snapshot in snapshots:
+            stock[snapshot.product_id] = snapshot.qty
+        movements = movements.filter(
+            StockMovement.timestamp >= db_timestamp(day_end(snapshot_day))
+        )
+    for product_id, delta in movements.group_by(StockMovement.product_id):
+        stock[product_id] += delta or 0
+    return dict(stock)
+
+
+def take_snapshots(day) -> int:
+    """
+    Write end of day snapshots of every storage, replace existing ones
+    :return: snapshots count
+    """
+    StockSnapshot.query.filter_by(day=day).delete()
+    rows = []
+    for (storage_id,) in db.session.query(Storage.id):
+        for product_id, qty in stock_at(storage_id, day_end(day)).items():
+            rows.append(
+                dict(storage_id=storage_id, product_id=product_id, day=day, qty=qty)
+            )
+    db.session.bulk_insert_mappings(StockSnapshot, rows)
+    db.session.commit()
+    return len(rows)
+
+
+def check(repair=False) -> list:
+    """
+    Compare stock levels with journal
+    :param repair: set stock levels to journal values
+    :return: list of (stock level, journal quantity) that differ
+    """
+    drifts = []
+    for (storage_id,) in db.session.query(Storage.id).order_by(Storage.id).all():
+        levels = StockLevel.query.filter_by(storage_id=storage_id)
+        if repair:
+            # writers change level and journal together, hold them off
+            levels = levels.with_for_update().populate_existing()
+        levels = levels.all()
+        derived = stock_at(storage_id, database_now())
+        for level in levels:
+            expected = derived.get(level.product_id, 0)
+            if abs((level.qty or 0) - expected) > 1e-6:
+                drifts.append((level, expected))
+    if repair and drifts:
+        for level, expected in drifts:
+            level.qty = expected
+            level.journaled = True
+        db.session.commit()
+    return drifts
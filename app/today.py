@@ -0,0 +1,86 @@
+"""
+Module contains shop day window: day in SHOP_TIMEZONE
+as range [start, end) of timestamps, today is computed once per request.
+Databases without time zone support keep naive UTC timestamps
+"""
+
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+from flask import g, has_app_context
+from sqlalchemy import and_, func
+
+from app import app, db
+
+
+class DayWindow(NamedTuple):
+    """Shop day and its timestamps range"""
+
+    day: date
+    start: datetime
+    end: datetime
+
+    def contains(self, column):
+        """Filter of column inside window, closed range on timestamp index"""
+        return and_(column >= db_timestamp(self.start), column < db_timestamp(self.end))
+
+
+def day_window(day=None) -> DayWindow:
+    """
+    Window of day in shop timezone, bounds are aware datetimes
+    :param day: date, today by default
+    """
+    zone = ZoneInfo(app.config["SHOP_TIMEZONE"])
+    if day is not None:
+        start = datetime.combine(day, time.min, tzinfo=zone)
+        return DayWindow(day, start, start + timedelta(days=1))
+    if has_app_context() and "day_window" in g:
+        return g.day_window
+    window = day_window(datetime.now(zone).date())
+    if has_app_context():
+        g.day_window = window
+    return window
+
+
+def local_day(timestamp) -> date:
+    """Shop day of timestamp, naive timestamps are taken as UTC"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(ZoneInfo(app.config["SHOP_TIMEZONE"])).date()
+
+
+def _is_postgresql() -> bool:
+    """Session of request is bound to PostgreSQL"""
+    return db.session().get_bind().dialect.name == "postgresql"
+
+
+def db_timestamp(moment) -> datetime:
+    """
+    Timestamp as database compares it with timestamp columns,
+    aware on PostgreSQL, naive UTC on databases without time zone support
+    """
+    if moment.tzinfo is None or _is_postgresql():
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def local_date(column):
+    """
+    SQL shop day of timestamp column, None on databases without
+    time zone support, their timestamps are converted by local_day
+    """
+    if _is_postgresql():
+        return func.date(func.timezone(app.config["SHOP_TIMEZONE"], column))
+    return None
+
+
+def database_now() -> datetime:
+    """
+    Current time of database, as timestamps are written by server default,
+    clock time on PostgreSQL to see rows committed before locks taken
+    """
+    if _is_postgresql():
+        return db.session.query(func.clock_timestamp()).scalar()
+    return db.session.query(func.now()).scalar()
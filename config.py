@@ -15,6 +15,12 @@ class Config:
     REPORTS_USER_VIEW = 3
     REPORTS_PER_PAGE = 3
     REPORTS_PER_DAY = 1
+    SHOP_TIMEZONE = os.environ.get('SHOP_TIMEZONE', 'Europe/Kiev')
+    DASHBOARD_CACHE_TIMEOUT = 60
+    REFERENCE_CACHE_TIMEOUT = 300
+    SLOW_QUERY_THRESHOLD = 0.5
+    SLOWEST_QUERIES_LOGGED = 5
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER') is not None
     LANGUAGES = ['ru', 'uk']
     BABEL_DEFAULT_LOCALE = 'ru'
 
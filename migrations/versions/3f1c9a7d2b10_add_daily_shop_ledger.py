@@ -0,0 +1,107 @@
+"""Add daily shop ledger
+
+Revision ID: 3f1c9a7d2b10
+Revises: 0cac8f6e5886
+Create Date: 2026-10-17 10:12:40.318204
+
+"""
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b10'
+down_revision = '0cac8f6e5886'
+branch_labels = None
+depends_on = None
+
+PRODUCTS = ('coffee_arabika', 'coffee_blend', 'milk', 'panini', 'sausages', 'buns')
+MONEY_COLUMNS = ('expense', 'supply', 'by_weight', 'deposit_fund', 'collection_fund')
+# transaction table -> (money column of ledger, product delta sign)
+SOURCES = (
+    ('expense', 'expense', 0),
+    ('supply', 'supply', 1),
+    ('by_weight', 'by_weight', -1),
+    ('write_off', None, -1),
+    ('deposit_fund', 'deposit_fund', 0),
+    ('collection_fund', 'collection_fund', 0),
+)
+
+
+def shop_day(column):
+    """
+    Shop day of timestamp column, as app.today.local_date, UTC day on
+    databases without time zone support, 'flask ledger rebuild' regroups
+    their rows by shop day
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        zone = current_app.config['SHOP_TIMEZONE']
+        return f"date(timezone('{zone}', {column}))"
+    return f'date({column})'
+
+
+def entries_select(table, money_column, product_sign):
+    """Ledger columns of every transaction row, as ledger.rebuild counts them"""
+    shop_id = 'storage.shop_id' if product_sign else f'{table}.shop_id'
+    type_cost = f'{table}.type_cost' if money_column else "'stock'"
+    columns = [
+        f'{shop_id} AS shop_id',
+        f"{shop_day(f'{table}.timestamp')} AS day",
+        f'{type_cost} AS type_cost',
+    ]
+    for column in MONEY_COLUMNS:
+        value = f'{table}.money' if column == money_column else '0'
+        columns.append(f'{value} AS {column}')
+    for product in PRODUCTS:
+        value = '0'
+        if product_sign:
+            value = (
+                f"CASE WHEN {table}.product_name = '{product}' "
+                f'THEN {product_sign} * {table}.amount ELSE 0 END'
+            )
+        columns.append(f'{value} AS {product}')
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if product_sign:
+        sql += f' JOIN storage ON storage.id = {table}.storage_id'
+    return sql
+
+
+def upgrade():
+    op.create_table('daily_shop_ledger',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shop_id', sa.Integer(), nullable=True),
+    sa.Column('day', sa.Date(), nullable=True),
+    sa.Column('type_cost', sa.String(length=64), nullable=True),
+    sa.Column('expense', sa.Integer(), nullable=True),
+    sa.Column('supply', sa.Integer(), nullable=True),
+    sa.Column('by_weight', sa.Integer(), nullable=True),
+    sa.Column('deposit_fund', sa.Integer(), nullable=True),
+    sa.Column('collection_fund', sa.Integer(), nullable=True),
+    sa.Column('coffee_arabika', sa.Float(precision=50), nullable=True),
+    sa.Column('coffee_blend', sa.Float(precision=50), nullable=True),
+    sa.Column('milk', sa.Float(precision=50), nullable=True),
+    sa.Column('panini', sa.Float(precision=50), nullable=True),
+    sa.Column('sausages', sa.Float(precision=50), nullable=True),
+    sa.Column('buns', sa.Float(precision=50), nullable=True),
+    sa.ForeignKeyConstraint(['shop_id'], ['shop.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shop_id', 'day', 'type_cost')
+    )
+    op.create_index(op.f('ix_daily_shop_ledger_day'), 'daily_shop_ledger', ['day'], unique=False)
+    op.create_index(op.f('ix_daily_shop_ledger_shop_id'), 'daily_shop_ledger', ['shop_id'], unique=False)
+    sums = ', '.join(f'COALESCE(SUM({c}), 0)' for c in MONEY_COLUMNS + PRODUCTS)
+    entries = ' UNION ALL '.join(entries_select(*source) for source in SOURCES)
+    op.execute(
+        'INSERT INTO daily_shop_ledger '
+        f"(shop_id, day, type_cost, {', '.join(MONEY_COLUMNS + PRODUCTS)}) "
+        f'SELECT shop_id, day, type_cost, {sums} FROM ({entries}) AS entries '
+        'WHERE shop_id IS NOT NULL AND day IS NOT NULL '
+        'GROUP BY shop_id, day, type_cost'
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_daily_shop_ledger_shop_id'), table_name='daily_shop_ledger')
+    op.drop_index(op.f('ix_daily_shop_ledger_day'), table_name='daily_shop_ledger')
+    op.drop_table('daily_shop_ledger')
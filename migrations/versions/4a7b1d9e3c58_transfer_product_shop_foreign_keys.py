@@ -0,0 +1,43 @@
+"""Transfer product shop foreign keys
+
+Revision ID: 4a7b1d9e3c58
+Revises: e2d94b7a0c13
+Create Date: 2026-10-17 19:48:03.672291
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7b1d9e3c58'
+down_revision = 'e2d94b7a0c13'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('where_shop', 'to_shop')
+
+
+def upgrade():
+    for name in COLUMNS:
+        op.add_column('transfer_product', sa.Column(f'{name}_id', sa.Integer(), nullable=True))
+        # transfers of deleted shops lose the shop
+        op.execute(
+            f'UPDATE transfer_product SET {name}_id = shop.id FROM shop '
+            f'WHERE CAST(shop.id AS VARCHAR) = transfer_product.{name}'
+        )
+        # transfers outlive their shops, the other shop keeps its history
+        op.create_foreign_key(f'transfer_product_{name}_id_fkey', 'transfer_product', 'shop', [f'{name}_id'], ['id'], ondelete='SET NULL')
+        op.create_index(f'ix_transfer_product_{name}_time', 'transfer_product', [f'{name}_id', 'timestamp'], unique=False)
+        op.drop_index(op.f(f'ix_transfer_product_{name}'), table_name='transfer_product')
+        op.drop_column('transfer_product', name)
+
+
+def downgrade():
+    for name in COLUMNS:
+        op.add_column('transfer_product', sa.Column(name, sa.String(length=64), nullable=True))
+        op.execute(f'UPDATE transfer_product SET {name} = CAST({name}_id AS VARCHAR)')
+        op.create_index(op.f(f'ix_transfer_product_{name}'), 'transfer_product', [name], unique=False)
+        op.drop_index(f'ix_transfer_product_{name}_time', table_name='transfer_product')
+        op.drop_constraint(f'transfer_product_{name}_id_fkey', 'transfer_product', type_='foreignkey')
+        op.drop_column('transfer_product', f'{name}_id')
@@ -0,0 +1,57 @@
+"""Stock movement journal and snapshots
+
+Revision ID: 5d7c0e93a1f4
+Revises: 8b2e5d41c7a3
+Create Date: 2026-10-17 16:40:27.118403
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7c0e93a1f4'
+down_revision = '8b2e5d41c7a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_movement',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('storage_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('delta', sa.Float(precision=50), nullable=True),
+    sa.Column('reason', sa.String(length=32), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.ForeignKeyConstraint(['storage_id'], ['storage.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_movement_storage_time', 'stock_movement', ['storage_id', 'timestamp'], unique=False)
+    op.create_index(op.f('ix_stock_movement_product_id'), 'stock_movement', ['product_id'], unique=False)
+    op.create_table('stock_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('storage_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('day', sa.Date(), nullable=True),
+    sa.Column('qty', sa.Float(precision=50), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.ForeignKeyConstraint(['storage_id'], ['storage.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('storage_id', 'day', 'product_id')
+    )
+    op.create_index(op.f('ix_stock_snapshot_product_id'), 'stock_snapshot', ['product_id'], unique=False)
+    # opening balance of the journal is current stock
+    op.execute(
+        'INSERT INTO stock_movement (storage_id, product_id, delta, reason) '
+        "SELECT storage_id, product_id, qty, 'initial' FROM stock_level"
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_stock_snapshot_product_id'), table_name='stock_snapshot')
+    op.drop_table('stock_snapshot')
+    op.drop_index(op.f('ix_stock_movement_product_id'), table_name='stock_movement')
+    op.drop_index('ix_stock_movement_storage_time', table_name='stock_movement')
+    op.drop_table('stock_movement')
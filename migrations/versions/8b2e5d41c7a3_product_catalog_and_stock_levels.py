@@ -0,0 +1,76 @@
+"""Product catalog and stock levels
+
+Revision ID: 8b2e5d41c7a3
+Revises: 3f1c9a7d2b10
+Create Date: 2026-10-17 14:02:11.529734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e5d41c7a3'
+down_revision = '3f1c9a7d2b10'
+branch_labels = None
+depends_on = None
+
+PRODUCTS = (
+    ('coffee_arabika', 'Арабика', 'кг', False, sa.Float(precision=50)),
+    ('coffee_blend', 'Купаж', 'кг', False, sa.Float(precision=50)),
+    ('milk', 'Молоко', 'л', False, sa.Float(precision=50)),
+    ('panini', 'Панини', 'шт.', True, sa.Integer()),
+    ('sausages', 'Колбаски', 'шт.', True, sa.Integer()),
+    ('buns', 'Булочки', 'шт.', True, sa.Integer()),
+)
+
+
+def upgrade():
+    product = op.create_table('product',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=True),
+    sa.Column('title', sa.String(length=64), nullable=True),
+    sa.Column('unit', sa.String(length=16), nullable=True),
+    sa.Column('is_piece', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_name'), 'product', ['name'], unique=True)
+    op.create_table('stock_level',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('storage_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('qty', sa.Float(precision=50), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.ForeignKeyConstraint(['storage_id'], ['storage.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('storage_id', 'product_id')
+    )
+    op.create_index(op.f('ix_stock_level_product_id'), 'stock_level', ['product_id'], unique=False)
+    op.create_index(op.f('ix_stock_level_storage_id'), 'stock_level', ['storage_id'], unique=False)
+    op.bulk_insert(product, [
+        dict(name=name, title=title, unit=unit, is_piece=is_piece)
+        for name, title, unit, is_piece, _type in PRODUCTS
+    ])
+    for name, *_rest in PRODUCTS:
+        op.execute(
+            'INSERT INTO stock_level (storage_id, product_id, qty) '
+            f"SELECT storage.id, product.id, COALESCE(storage.{name}, 0) "
+            f"FROM storage, product WHERE product.name = '{name}'"
+        )
+    for name, *_rest in PRODUCTS:
+        op.drop_column('storage', name)
+
+
+def downgrade():
+    for name, _title, _unit, _is_piece, column_type in PRODUCTS:
+        op.add_column('storage', sa.Column(name, column_type, nullable=True))
+        op.execute(
+            f'UPDATE storage SET {name} = (SELECT stock_level.qty FROM stock_level '
+            'JOIN product ON product.id = stock_level.product_id '
+            f"WHERE stock_level.storage_id = storage.id AND product.name = '{name}')"
+        )
+    op.drop_index(op.f('ix_stock_level_storage_id'), table_name='stock_level')
+    op.drop_index(op.f('ix_stock_level_product_id'), table_name='stock_level')
+    op.drop_table('stock_level')
+    op.drop_index(op.f('ix_product_name'), table_name='product')
+    op.drop_table('product')
@@ -0,0 +1,56 @@
+"""Cash ledger and checkpoints
+
+Revision ID: a41f6c2e9d07
+Revises: 5d7c0e93a1f4
+Create Date: 2026-10-17 18:05:52.640219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f6c2e9d07'
+down_revision = '5d7c0e93a1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cash_entry',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shop_id', sa.Integer(), nullable=True),
+    sa.Column('debit', sa.String(length=32), nullable=True),
+    sa.Column('credit', sa.String(length=32), nullable=True),
+    sa.Column('amount', sa.Integer(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['shop_id'], ['shop.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_cash_entry_shop_time', 'cash_entry', ['shop_id', 'timestamp'], unique=False)
+    op.create_table('cash_checkpoint',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shop_id', sa.Integer(), nullable=True),
+    sa.Column('day', sa.Date(), nullable=True),
+    sa.Column('cash', sa.Integer(), nullable=True),
+    sa.Column('cashless', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['shop_id'], ['shop.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shop_id', 'day')
+    )
+    # opening balances of the ledger are current shop balances
+    for account in ('cash', 'cashless'):
+        op.execute(
+            'INSERT INTO cash_entry (shop_id, debit, credit, amount) '
+            f"SELECT id, '{account}', 'opening', {account} FROM shop WHERE {account} > 0"
+        )
+        op.execute(
+            'INSERT INTO cash_entry (shop_id, debit, credit, amount) '
+            f"SELECT id, 'opening', '{account}', -{account} FROM shop WHERE {account} < 0"
+        )
+
+
+def downgrade():
+    op.drop_table('cash_checkpoint')
+    op.drop_index('ix_cash_entry_shop_time', table_name='cash_entry')
+    op.drop_table('cash_entry')
@@ -0,0 +1,69 @@
+"""Daily report accumulators
+
+Revision ID: c7f31e8a5b62
+Revises: a41f6c2e9d07
+Create Date: 2026-10-17 18:21:47.103926
+
+"""
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f31e8a5b62'
+down_revision = 'a41f6c2e9d07'
+branch_labels = None
+depends_on = None
+
+
+def shop_day(column):
+    """
+    Shop day of timestamp column, as app.today.local_date, UTC day on
+    databases without time zone support, 'flask ledger rebuild' regroups
+    their rows by shop day
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        zone = current_app.config['SHOP_TIMEZONE']
+        return f"date(timezone('{zone}', {column}))"
+    return f'date({column})'
+
+
+def upgrade():
+    op.add_column('daily_shop_ledger', sa.Column('local_expense', sa.Integer(), nullable=True))
+    op.create_table('daily_product_ledger',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shop_id', sa.Integer(), nullable=True),
+    sa.Column('day', sa.Date(), nullable=True),
+    sa.Column('product_name', sa.String(length=80), nullable=True),
+    sa.Column('by_weight', sa.Float(precision=50), nullable=True),
+    sa.ForeignKeyConstraint(['shop_id'], ['shop.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shop_id', 'day', 'product_name')
+    )
+    op.create_index(op.f('ix_daily_product_ledger_day'), 'daily_product_ledger', ['day'], unique=False)
+    op.create_index(op.f('ix_daily_product_ledger_shop_id'), 'daily_product_ledger', ['shop_id'], unique=False)
+    op.execute(
+        'UPDATE daily_shop_ledger SET local_expense = COALESCE(('
+        'SELECT SUM(expense.money) FROM expense '
+        'WHERE expense.shop_id = daily_shop_ledger.shop_id '
+        f"AND {shop_day('expense.timestamp')} = daily_shop_ledger.day "
+        'AND expense.type_cost = daily_shop_ledger.type_cost '
+        'AND (expense.is_global IS NULL OR NOT expense.is_global)), 0)'
+    )
+    day = shop_day('by_weight.timestamp')
+    op.execute(
+        'INSERT INTO daily_product_ledger (shop_id, day, product_name, by_weight) '
+        f"SELECT storage.shop_id, {day}, by_weight.product_name, "
+        'COALESCE(SUM(by_weight.amount), 0) FROM by_weight '
+        'JOIN storage ON storage.id = by_weight.storage_id '
+        'WHERE storage.shop_id IS NOT NULL AND by_weight.timestamp IS NOT NULL '
+        f'GROUP BY storage.shop_id, {day}, by_weight.product_name'
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_daily_product_ledger_shop_id'), table_name='daily_product_ledger')
+    op.drop_index(op.f('ix_daily_product_ledger_day'), table_name='daily_product_ledger')
+    op.drop_table('daily_product_ledger')
+    op.drop_column('daily_shop_ledger', 'local_expense')
@@ -0,0 +1,32 @@
+"""Transaction composite indexes
+
+Revision ID: e2d94b7a0c13
+Revises: c7f31e8a5b62
+Create Date: 2026-10-17 19:05:32.418760
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2d94b7a0c13'
+down_revision = 'c7f31e8a5b62'
+branch_labels = None
+depends_on = None
+
+STORAGE_TABLES = ('supply', 'by_weight', 'write_off')
+
+
+def upgrade():
+    # local expenses are selected by is_global = false
+    op.execute(sa.text('UPDATE expense SET is_global = false WHERE is_global IS NULL'))
+    op.create_index('ix_expense_shop_global_time', 'expense', ['shop_id', 'is_global', 'timestamp'], unique=False)
+    for table in STORAGE_TABLES:
+        op.create_index(f'ix_{table}_storage_time', table, ['storage_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    for table in STORAGE_TABLES:
+        op.drop_index(f'ix_{table}_storage_time', table_name=table)
+    op.drop_index('ix_expense_shop_global_time', table_name='expense')
@@ -0,0 +1,120 @@
+"""
+Test fixtures: app on in-memory SQLite, shop with storage and catalog,
+barista logged in to test client
+"""
+
+
+import os
+import sqlite3
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LOG_TO_STDOUT", "1")
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app as flask_app
+from app import db
+from app.cache import reference_cache
+from app.models import (Barista, Category, Product, Role, Shop, ShopEquipment,
+                        Storage)
+
+PRODUCTS = (
+    ("coffee_arabika", "Арабика", "кг", False),
+    ("coffee_blend", "Купаж", "кг", False),
+    ("milk", "Молоко", "л", False),
+    ("panini", "Панини", "шт.", True),
+    ("sausages", "Колбаски", "шт.", True),
+    ("buns", "Булочки", "шт.", True),
+)
+
+
+@event.listens_for(Engine, "connect")
+def enable_foreign_keys(dbapi_connection, connection_record):
+    """SQLite applies ON DELETE actions only with foreign keys enabled"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+
+@pytest.fixture
+def app():
+    """App with empty database, tables created for every test"""
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with flask_app.app_context():
+        db.create_all()
+        reference_cache.clear()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+    reference_cache.clear()
+
+
+@pytest.fixture
+def queries(app):
+    """SQL statements executed during test, in order"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def catalog(app):
+    """Base product catalog"""
+    for name, title, unit, is_piece in PRODUCTS:
+        db.session.add(Product(name=name, title=title, unit=unit, is_piece=is_piece))
+    db.session.commit()
+
+
+def make_shop(place_name, address, cash=0, cashless=0, **stock):
+    """Shop with storage and equipment, stock quantities by product name"""
+    shop = Shop(place_name=place_name, address=address, cash=cash, cashless=cashless)
+    shop.storage = Storage()
+    shop.shop_equipment = ShopEquipment(coffee_machine="machine")
+    db.session.add(shop)
+    for product_name, qty in stock.items():
+        shop.storage.set_quantity(product_name, qty, "initial")
+    db.session.commit()
+    return shop
+
+
+@pytest.fixture
+def shop(catalog):
+    """Shop with some cash and stock"""
+    return make_shop(
+        "Shop", "Street 1", cash=1000, cashless=500, coffee_blend=5.0, milk=10.0
+    )
+
+
+@pytest.fixture
+def other_shop(catalog):
+    """Second shop, transfer counterpart"""
+    return make_shop("Other", "Street 2", coffee_blend=1.0)
+
+
+@pytest.fixture
+def barista(shop):
+    """Barista working at shop"""
+    role = Role(name="user")
+    user = Barista(name="barista", email="barista@example.com", active=True)
+    user.password = "password"
+    user.roles.append(role)
+    shop.baristas.append(user)
+    db.session.add(Category(name="Вода"))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, barista):
+    """Test client logged in as barista"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(barista.id)
+        session["_fresh"] = True
+    return client
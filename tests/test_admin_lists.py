@@ -0,0 +1,92 @@
+"""Admin list views load rows with fixed number of queries"""
+
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import (ByWeight, Category, CollectionFund, DepositFund,
+                        Expense, Report, Role, Shop, Storage, Supply,
+                        TransferProduct, WriteOff)
+
+LIST_VIEWS = (
+    "expense",
+    "supply",
+    "byweight",
+    "writeoff",
+    "transferproduct",
+    "depositfund",
+    "collectionfund",
+    "report",
+    "storage",
+)
+
+
+@pytest.fixture
+def admin(barista):
+    """Barista with admin role"""
+    barista.roles.append(Role(name="admin"))
+    db.session.commit()
+    return barista
+
+
+def add_rows(other_shop, barista, count):
+    """Transactions and reports of count days, every day in new shop"""
+    category = Category.query.first()
+    for days in range(count):
+        number = Shop.query.count() + 1
+        shop = Shop(place_name=f"Shop {number}", address=f"Street {number}")
+        shop.storage = Storage()
+        timestamp = datetime(2026, 3, 1, 12) + timedelta(days=days)
+        product = dict(product_name="coffee_blend", amount=0.1, timestamp=timestamp)
+        money = dict(type_cost="cash", money=10)
+        expense = Expense(
+            shop=shop,
+            barista=barista,
+            categories=[category],
+            timestamp=timestamp,
+            **money,
+        )
+        db.session.add_all(
+            [
+                expense,
+                Supply(storage=shop.storage, barista=barista, **money, **product),
+                ByWeight(storage=shop.storage, barista=barista, **money, **product),
+                WriteOff(storage=shop.storage, barista=barista, **product),
+                TransferProduct(
+                    where_shop=shop, to_shop=other_shop, barista=barista, **product
+                ),
+                DepositFund(shop=shop, barista=barista, timestamp=timestamp, **money),
+                CollectionFund(
+                    shop=shop, barista=barista, timestamp=timestamp, **money
+                ),
+                Report(
+                    shop=shop,
+                    barista=barista,
+                    cashbox=100,
+                    timestamp=timestamp,
+                    expenses=[expense],
+                ),
+            ]
+        )
+    db.session.commit()
+
+
+def list_queries(client, queries, view):
+    """Count of queries of admin list page, reference caches are warm"""
+    client.get(f"/admin/{view}/")
+    db.session.remove()
+    del queries[:]
+    response = client.get(f"/admin/{view}/")
+    assert response.status_code == 200
+    return len(queries)
+
+
+def test_list_queries_do_not_grow_with_rows(client, queries, other_shop, admin):
+    add_rows(other_shop, admin, 2)
+    few = {view: list_queries(client, queries, view) for view in LIST_VIEWS}
+    other_shop, admin = map(db.session.merge, (other_shop, admin))
+    add_rows(other_shop, admin, 6)
+    many = {view: list_queries(client, queries, view) for view in LIST_VIEWS}
+    assert many == few
@@ -0,0 +1,35 @@
+"""Sum and percentile footers of admin list views"""
+
+
+from app import db
+from app.admin_panel import summary_aggregates
+from app.models import Expense
+
+MONEY = (10, 20, 30, 40, 50, 60, 70, 80, 90, 1000)
+
+
+def test_percentiles_interpolate_as_percentile_cont(app, shop, queries):
+    for money in MONEY:
+        db.session.add(Expense(shop=shop, type_cost="cash", money=money))
+    db.session.add(Expense(shop=shop, type_cost="cash", money=None))
+    db.session.commit()
+    queries.clear()
+    [(total, ranks)] = summary_aggregates(Expense.query, [Expense.money])
+    assert total == sum(MONEY)
+    assert ranks == {0.5: 55.0, 0.9: 181.0, 0.99: 918.1}
+    assert len(queries) == 2
+    assert all("LIMIT" in sql or "count" in sql for sql in queries)
+
+
+def test_percentiles_of_filtered_and_empty_queries(app, shop):
+    for money in MONEY:
+        db.session.add(Expense(shop=shop, type_cost="cash", money=money))
+    db.session.commit()
+    small = Expense.query.filter(Expense.money < 45)
+    assert summary_aggregates(small, [Expense.money]) == [
+        (100, {0.5: 25.0, 0.9: 37.0, 0.99: 39.7})
+    ]
+    empty = Expense.query.filter(Expense.money > 5000)
+    assert summary_aggregates(empty, [Expense.money]) == [
+        (0, {0.5: 0, 0.9: 0, 0.99: 0})
+    ]
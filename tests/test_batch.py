@@ -0,0 +1,67 @@
+"""Batch import of offline transactions"""
+
+
+from datetime import date, datetime
+
+import pytest
+
+from app import cash_ledger, db, stock
+from app.models import (CashEntry, Report, Role, StockLevel, StockMovement,
+                        Supply)
+
+DAY = date(2026, 3, 10)
+
+
+def supply(shop, product, amount, money, **record):
+    """Batch record of cash supply"""
+    return dict(
+        type="supply",
+        coffee_shop=shop.id,
+        product=product,
+        amount=amount,
+        type_cost="cash",
+        money=money,
+        **record,
+    )
+
+
+@pytest.fixture
+def moderator(barista):
+    """Barista with moderator role, may backdate records"""
+    barista.roles.append(Role(name="moderator"))
+    db.session.commit()
+    return barista
+
+
+def test_repeated_new_product_updates_one_level(client, shop):
+    records = [supply(shop, "panini", 3, 60), supply(shop, "panini", 2, 40)]
+    response = client.post("/menu/batch", json=records)
+    assert response.json == {"created": 2}
+    [level] = [lv for lv in shop.storage.stock_levels if lv.product.name == "panini"]
+    assert level.qty == 5
+    assert StockLevel.query.filter_by(product_id=level.product_id).count() == 1
+
+
+def test_backdated_record_backdates_journals(client, shop, moderator):
+    record = supply(shop, "milk", 4, 100, timestamp="2026-03-10T12:00:00")
+    assert client.post("/menu/batch", json=[record]).json == {"created": 1}
+    # noon in shop time zone, two hours ahead of UTC in March
+    utc_noon = datetime(2026, 3, 10, 10)
+    assert Supply.query.one().timestamp == utc_noon
+    entries = CashEntry.query.filter_by(credit="cash")
+    assert [entry.timestamp for entry in entries] == [utc_noon]
+    movement = StockMovement.query.filter_by(reason="supply").one()
+    assert movement.timestamp == utc_noon
+    # shop is opened today, its history of the day holds the supply only
+    end = cash_ledger.day_end(DAY)
+    assert cash_ledger.balance_at(shop.id, end)["cash"] == -100
+    assert stock.stock_at(shop.storage.id, end) == {movement.product_id: 4}
+
+
+def test_backdated_record_of_reported_day_is_rejected(client, shop, moderator):
+    db.session.add(Report(shop=shop, timestamp=datetime(2026, 3, 10, 15)))
+    db.session.commit()
+    record = supply(shop, "milk", 4, 100, timestamp="2026-03-10T12:00:00")
+    response = client.post("/menu/batch", json=[record])
+    assert response.status_code == 400
+    assert Supply.query.count() == 0
@@ -0,0 +1,40 @@
+"""Catalog products outside report columns"""
+
+
+from app import db
+from app.cache import product_choices, reference_cache
+from app.models import Product, Report
+
+
+def add_tea(shop):
+    """Weighed catalog product without report columns, in stock"""
+    db.session.add(Product(name="tea", title="Чай", unit="кг", is_piece=False))
+    shop.storage.set_quantity("tea", 3.0, "initial")
+    db.session.commit()
+    reference_cache.clear()
+
+
+def test_weighed_choices_hold_report_products_only(app, shop):
+    add_tea(shop)
+    assert "tea" in dict(product_choices())
+    assert list(dict(product_choices(weighed=True))) == [
+        "coffee_arabika",
+        "coffee_blend",
+        "milk",
+    ]
+
+
+def test_report_counts_report_products_and_keeps_other_stock(client, shop):
+    add_tea(shop)
+    remainders = dict(
+        coffee_arabika=0, coffee_blend=4, milk=8, panini=0, sausages=0, buns=0
+    )
+    response = client.post(
+        "/report/create",
+        data=dict(shop=shop.id, cashless=0, actual_balance=1000, **remainders),
+    )
+    assert response.status_code == 302
+    report = Report.query.one()
+    assert (report.consumption_coffee_blend, report.consumption_milk) == (1, 2)
+    assert shop.storage.quantity("coffee_blend") == 4
+    assert shop.storage.quantity("tea") == 3
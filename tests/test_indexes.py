@@ -0,0 +1,55 @@
+"""Transaction queries use composite indexes"""
+
+
+from sqlalchemy import text
+
+from app import db
+from app.models import ByWeight, Expense, Supply, TransferProduct, WriteOff
+
+
+def query_plan(query) -> str:
+    """SQLite query plan of ORM query"""
+    statement = query.statement.compile(
+        db.engine, compile_kwargs={"literal_binds": True}
+    )
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {statement}"))
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_local_expenses_use_shop_global_time_index(app, shop):
+    assert "ix_expense_shop_global_time" in query_plan(Expense.get_local(shop.id, True))
+    assert "ix_expense_shop_global_time" in query_plan(
+        Expense.get_global(shop.id, True)
+    )
+
+
+def test_storage_transactions_use_storage_time_index(app, shop):
+    for model, index in (
+        (Supply, "ix_supply_storage_time"),
+        (ByWeight, "ix_by_weight_storage_time"),
+    ):
+        assert index in query_plan(model.get_local(shop.storage.id))
+    for model, index in (
+        (Supply, "ix_supply_storage_time"),
+        (ByWeight, "ix_by_weight_storage_time"),
+        (WriteOff, "ix_write_off_storage_time"),
+    ):
+        assert index in query_plan(model.get_local_by_shop(shop.id))
+
+
+def test_day_transfers_use_shop_time_indexes(app, shop):
+    plan = query_plan(TransferProduct.get_on_day([shop.id]))
+    assert "ix_transfer_product_where_shop_time" in plan
+    assert "ix_transfer_product_to_shop_time" in plan
+
+
+def test_local_filter_selects_local_expenses(app, shop):
+    db.session.add_all(
+        [
+            Expense(shop=shop, type_cost="cash", money=10, is_global=False),
+            Expense(shop=shop, type_cost="cash", money=20, is_global=True),
+        ]
+    )
+    db.session.commit()
+    assert [e.money for e in Expense.get_local(shop.id, True)] == [10]
+    assert [e.money for e in Expense.get_global(shop.id, True)] == [20]
@@ -0,0 +1,136 @@
+"""Daily shop ledger kept in sync with transactions"""
+
+
+from datetime import date, datetime, time
+
+from app import cli, db, ledger
+from app.models import (ByWeight, Category, DailyProductLedger, DailyShopLedger,
+                        Expense)
+from app.today import day_window
+
+
+def test_menu_expense_reaches_ledger(client, shop):
+    response = client.post(
+        "/menu/expense",
+        data={
+            "coffee_shop": shop.id,
+            "type_cost": "cash",
+            "money": 50,
+            "categories": [Category.query.first().id],
+        },
+    )
+    assert response.status_code == 302
+    assert Expense.query.count() == 1
+    row = DailyShopLedger.query.filter_by(
+        shop_id=shop.id, day=day_window().day, type_cost="cash"
+    ).one()
+    assert (row.expense, row.local_expense) == (50, 50)
+
+
+def test_changed_expense_moves_ledger_row(app, shop):
+    expense = Expense(shop=shop, type_cost="cash", money=50)
+    db.session.add(expense)
+    db.session.commit()
+    expense.type_cost = "cashless"
+    expense.money = 70
+    db.session.commit()
+    rows = {
+        row.type_cost: row.expense
+        for row in DailyShopLedger.query.filter_by(shop_id=shop.id)
+    }
+    assert rows == {"cash": 0, "cashless": 70}
+
+
+def test_expense_flushed_without_shop_reaches_ledger(app, shop):
+    expense = Expense(type_cost="cash", money=50)
+    db.session.add(expense)
+    db.session.flush()
+    expense.shop = shop
+    db.session.commit()
+    row = DailyShopLedger.query.filter_by(shop_id=shop.id, type_cost="cash").one()
+    assert row.expense == 50
+
+
+def add_day_transactions(shop, day):
+    """Cash, cashless and global expenses and by weight sales of day"""
+    noon = datetime.combine(day, time(12))
+    late = datetime.combine(day, time(18))
+    db.session.add_all(
+        [
+            Expense(shop=shop, type_cost="cash", money=50, timestamp=noon),
+            Expense(shop=shop, type_cost="cashless", money=20, timestamp=noon),
+            Expense(
+                shop=shop, type_cost="cash", money=30, is_global=True, timestamp=late
+            ),
+            ByWeight(
+                storage=shop.storage,
+                type_cost="cash",
+                money=40,
+                amount=0.25,
+                product_name="coffee_blend",
+                timestamp=late,
+            ),
+        ]
+    )
+    db.session.commit()
+
+
+def test_day_totals_match_transactions(app, shop):
+    day = date(2026, 3, 10)
+    add_day_transactions(shop, day)
+    assert ledger.day_totals(shop.id, day) == {
+        "expense": 50,
+        "by_weight": 40,
+        "weights": {"coffee_blend": 0.25},
+    }
+    assert ledger.check(day) == []
+
+
+def test_check_reports_drift(app, shop):
+    day = date(2026, 3, 10)
+    add_day_transactions(shop, day)
+    DailyShopLedger.query.filter_by(shop_id=shop.id, type_cost="cash").update(
+        {"local_expense": 10}
+    )
+    assert ledger.check(day) == [(shop.id, "expense", 10, 50)]
+
+
+def test_rebuild_keeps_incremental_days(app, shop):
+    for day in (date(2026, 3, 10), date(2026, 7, 10)):
+        add_day_transactions(shop, day)
+        # 22:30 UTC is the next day in shop time zone in summer and in winter
+        midnight = datetime.combine(day, time(22, 30))
+        db.session.add(
+            ByWeight(
+                storage=shop.storage,
+                type_cost="cash",
+                money=10,
+                amount=0.1,
+                product_name="coffee_arabika",
+                timestamp=midnight,
+            )
+        )
+        db.session.commit()
+    columns = ("shop_id", "day", "type_cost", "expense", "local_expense", "by_weight")
+
+    def ledger_rows():
+        return sorted(
+            tuple(getattr(row, column) for column in columns)
+            for row in DailyShopLedger.query
+        )
+
+    def product_rows():
+        return sorted(
+            (row.shop_id, row.day, row.product_name, row.by_weight)
+            for row in DailyProductLedger.query
+        )
+
+    incremental = ledger_rows(), product_rows()
+    ledger.rebuild()
+    assert (ledger_rows(), product_rows()) == incremental
+
+
+def test_ledger_check_command(app, shop):
+    add_day_transactions(shop, date(2026, 3, 10))
+    result = app.test_cli_runner().invoke(cli.ledger_check, ["--day", "2026-03-10"])
+    assert "Ledger totals out of transactions for 2026-03-10: 0." in result.output
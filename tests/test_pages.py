@@ -0,0 +1,65 @@
+"""Pages render and the queries they run"""
+
+
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Category, Expense, Report, Shop
+
+
+def test_home_renders_transaction_modals(client, shop):
+    page = client.get("/index").get_data(as_text=True)
+    assert 'id="ConsumptionModal"' in page
+    assert 'id="TransferModal"' in page
+
+
+def test_other_pages_skip_transaction_modals(client, barista, queries):
+    page = client.get(f"/user/{barista.name}").get_data(as_text=True)
+    assert 'id="ConsumptionModal"' not in page
+    assert 'data-bs-target="#ConsumptionModal"' not in page
+    assert not any("FROM category" in sql for sql in queries)
+
+
+def test_home_loads_shops_once(client, shop, queries):
+    # shop choices of forms are cached, second request loads page shops only
+    client.get("/index")
+    queries.clear()
+    client.get("/index")
+    shop_queries = [sql for sql in queries if sql.startswith("SELECT shop.id")]
+    assert len(shop_queries) == 1
+
+
+def test_report_page_queries_do_not_grow_with_reports(client, shop, barista, queries):
+    numbers = {
+        column.name: 0
+        for column in Report.__table__.columns
+        if isinstance(column.type, (db.Integer, db.Float))
+        and not (column.primary_key or column.foreign_keys)
+    }
+
+    def page_queries(count):
+        for _ in range(count):
+            timestamp = datetime(2026, 3, 1, 12) + timedelta(days=Report.query.count())
+            expense = Expense(
+                shop=shop, type_cost="cash", money=10, timestamp=timestamp
+            )
+            expense.categories.append(Category.query.first())
+            report = Report(shop=shop, barista=barista, timestamp=timestamp, **numbers)
+            report.expenses.append(expense)
+            db.session.add(report)
+        db.session.commit()
+        db.session.expire_all()
+        queries.clear()
+        client.get(f"/report/{shop.address}")
+        return len(queries)
+
+    # first request fills reference caches
+    page_queries(1)
+    assert page_queries(1) == page_queries(3)
+
+
+def test_model_queries_skip_unread_relationships(barista, queries):
+    queries.clear()
+    for model in (Shop, Expense, Report):
+        model.query.all()
+    assert len(queries) == 3
@@ -0,0 +1,17 @@
+"""SQL statements stats of requests"""
+
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+
+
+def test_failed_statement_leaves_no_start_time(app):
+    with db.engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info.get("query_start") == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start"] == []
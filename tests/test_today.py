@@ -0,0 +1,49 @@
+"""Shop day window and shop day of timestamps"""
+
+
+from datetime import date, datetime, time
+
+from app import db
+from app.business_logic import load_day_transactions
+from app.models import Category, Expense
+from app.today import day_window, local_day
+
+# shop time zone is two hours ahead of UTC in winter
+DAY = date(2026, 3, 10)
+AFTER_LOCAL_MIDNIGHT = datetime(2026, 3, 9, 22, 30)
+BEFORE_LOCAL_MIDNIGHT = datetime(2026, 3, 10, 21, 30)
+NEXT_DAY = datetime(2026, 3, 10, 22, 30)
+
+
+def test_window_holds_utc_timestamps_of_shop_day(app, shop):
+    for timestamp in (AFTER_LOCAL_MIDNIGHT, BEFORE_LOCAL_MIDNIGHT, NEXT_DAY):
+        db.session.add(
+            Expense(shop=shop, type_cost="cash", money=10, timestamp=timestamp)
+        )
+    db.session.commit()
+    in_day = Expense.query.filter(day_window(DAY).contains(Expense.timestamp))
+    assert sorted(e.timestamp for e in in_day) == [
+        AFTER_LOCAL_MIDNIGHT,
+        BEFORE_LOCAL_MIDNIGHT,
+    ]
+
+
+def test_window_bounds_are_shop_midnights(app):
+    window = day_window(DAY)
+    assert window.start == datetime.combine(DAY, time.min, tzinfo=window.start.tzinfo)
+    assert local_day(AFTER_LOCAL_MIDNIGHT) == DAY
+    assert local_day(NEXT_DAY) == date(2026, 3, 11)
+
+
+def test_expense_of_now_is_today(client, shop):
+    client.post(
+        "/menu/expense",
+        data={
+            "coffee_shop": shop.id,
+            "type_cost": "cash",
+            "money": 50,
+            "categories": [Category.query.first().id],
+        },
+    )
+    assert len(load_day_transactions([shop])[shop.id].local_expenses) == 1
+    assert client.get(f"/report/preview/{shop.id}").json["expense"] == 50
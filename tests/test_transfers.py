@@ -0,0 +1,30 @@
+"""Stock transfers between shops"""
+
+
+from app import db
+from app.models import Shop, TransferProduct
+
+
+def test_deleted_shop_keeps_transfers_of_other_shop(app, shop, other_shop):
+    db.session.add_all(
+        [
+            TransferProduct(
+                where_shop=shop, to_shop=other_shop, product_name="milk", amount=2
+            ),
+            TransferProduct(
+                where_shop=other_shop,
+                to_shop=shop,
+                product_name="coffee_blend",
+                amount=1,
+            ),
+        ]
+    )
+    db.session.commit()
+    db.session.delete(Shop.query.get(other_shop.id))
+    db.session.commit()
+    db.session.expire_all()
+    transfers = TransferProduct.of_shops([shop.id]).order_by(TransferProduct.id).all()
+    assert [(t.where_shop_id, t.to_shop_id) for t in transfers] == [
+        (shop.id, None),
+        (None, shop.id),
+    ]